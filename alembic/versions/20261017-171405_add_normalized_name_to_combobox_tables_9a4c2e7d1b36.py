@@ -0,0 +1,74 @@
+"""add normalized name to combobox tables
+
+Revision ID: 9a4c2e7d1b36
+Revises: 5e0b1f7c93a8
+Create Date: 2026-10-17 17:14:05.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from utils.text import normalize_name
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c2e7d1b36'
+down_revision = '5e0b1f7c93a8'
+branch_labels = None
+depends_on = None
+
+# tabulka -> sloupec, ze ktereho se normalizovane jmeno pocita
+NAME_COLUMNS = {
+    'airport': 'icao_code',
+    'point_of_interest_type': 'name',
+    'point_of_interest': 'name',
+    'aircraft': 'call_sign',
+    'copilot': 'name',
+}
+
+
+def backfill_normalized_name(table_name: str, name_column: str):
+    # jmeno dostane jen nejstarsi z duplicit, zbytek sloucit pres scripts/merge_duplicate_names.py
+    connection = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column('id'), sa.column('created_by_id'), sa.column('deleted'), sa.column(name_column),
+        sa.column('normalized_name'),
+    )
+
+    rows = connection.execute(
+        sa.select(table.c.id, table.c.created_by_id, table.c[name_column])
+        .where(table.c.deleted.is_(False))
+        .order_by(table.c.id)
+    ).all()
+
+    seen = set()
+    values = []
+    for id, created_by_id, name in rows:
+        key = (created_by_id, normalize_name(name))
+        if created_by_id is not None and key in seen:
+            continue
+        seen.add(key)
+        values.append({'row_id': id, 'normalized_name': key[1]})
+
+    if values:
+        connection.execute(
+            table.update()
+            .where(table.c.id == sa.bindparam('row_id'))
+            .values(normalized_name=sa.bindparam('normalized_name')),
+            values
+        )
+
+
+def upgrade() -> None:
+    for table_name, name_column in NAME_COLUMNS.items():
+        op.add_column(table_name, sa.Column('normalized_name', sa.String(length=128), nullable=True))
+        backfill_normalized_name(table_name, name_column)
+        op.create_unique_constraint(
+            f'uq_{table_name}_created_by_normalized_name', table_name, ['created_by_id', 'normalized_name']
+        )
+
+
+def downgrade() -> None:
+    for table_name in NAME_COLUMNS:
+        op.drop_constraint(f'uq_{table_name}_created_by_normalized_name', table_name, type_='unique')
+        op.drop_column(table_name, 'normalized_name')
@@ -1,8 +1,11 @@
-from aiohttp import ClientResponseError
+import asyncio
+from aiohttp import ClientError
 from database import models
 from database.transaction import get_session
 from external.elevation import elevation_api
 from external.gpx_parser import GPXParser
+from external.gpx_track_cache import build_track_cache
+from logger import log
 from paths import FLIGHT_GPX_TRACK_PATH
 
 
@@ -12,17 +15,19 @@ async def add_terrain_elevation_to_flight(flight_id: int, gpx_filename: str):
 
     try:
         elevation = await elevation_api.get_elevation_for_points(coordinates)
-        tree_with_elevation = gpx_parser.add_terrain_elevation(elevation)
+        gpx_parser.add_terrain_elevation(elevation)
         output_name = f"terrain_{gpx_filename}"
-        gpx_parser.write(tree_with_elevation, f"{FLIGHT_GPX_TRACK_PATH}/{output_name}")
+        gpx_parser.write(f"{FLIGHT_GPX_TRACK_PATH}/{output_name}")
+        await asyncio.to_thread(build_track_cache, output_name)
 
         async with get_session() as db:
             await models.Flight.update(
                 db, {"gpx_track_filename": output_name, "has_terrain_elevation": True},
                 id=flight_id
             )
-    except ClientResponseError as e:
-        print(e)
+    except (ClientError, asyncio.TimeoutError, ValueError) as e:
+        # ValueError - vysledek nesedi na body trasy
+        log.error(f"Cannot add terrain elevation to flight ID={flight_id}: {type(e).__name__}: {e}")
 
 
 async def add_terrain_elevation_to_photo(photo):
@@ -30,7 +35,7 @@ async def add_terrain_elevation_to_photo(photo):
         elevation = await elevation_api.get_elevation_for_points([
             {"lat": photo.gps_latitude, "lng": photo.gps_longitude}
         ])
-        if not elevation:
+        if not elevation or elevation[0]['elevation'] is None:
             print("Cannot get elevation")
             return
 
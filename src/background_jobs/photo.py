@@ -1,41 +1,82 @@
 import os.path
 from time import time
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import PHOTO_VARIANT_WIDTHS, PHOTO_VARIANT_FORMATS
 from database import models
 from database.transaction import get_session
-from utils.image import PhotoEditor
+from utils.image import PhotoPipeline
 
 
-async def resize_photo(path: str, filename: str, photo_id: int):
-    editor = PhotoEditor(path, filename)
-    editor.resize(new_width=2500)
+async def add_to_variants_manifest(db: AsyncSession, photo_id: int, variants: dict) -> models.Photo:
+    # zamek radku - manifest muze soucasne zapisovat editor fotky nebo skript reconcile_photo_variants
+    photo = (await db.scalars(
+        select(models.Photo)
+        .filter(models.Photo.id == photo_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )).one()
+    photo.variants_manifest = {**(photo.variants_manifest or {}), **variants}
 
+    return photo
+
+
+async def record_photo_variants(photo_id: int, **variants):
+    async with get_session() as db:
+        await add_to_variants_manifest(db, photo_id, variants)
+
+
+async def resize_photo(path: str, filename: str, photo_id: Optional[int] = None, new_width: int = 2500):
     name, _ = os.path.splitext(filename)
-    editor.write_to_file(quality=95, format_="webp", dest_filename=f"{name}.webp")
-    editor.write_to_file(quality=80)  # toto je potreba pro prvni nacteni nahledu ihned po nahrani, pripadne pro
-    # vygenerovani nahledu (async, muze se delat pred/behem zmensovani fotky -> v tu dobu jeste neexistuje webp)
-    width, height = editor.img_size
+    result = await (
+        PhotoPipeline(path, filename)
+        .resize(new_width=new_width)
+        .write_to_file(quality=95, format_="webp", dest_filename=f"{name}.webp")
+        # JPG je potreba pro prvni nacteni nahledu ihned po nahrani, pripadne pro vygenerovani nahledu
+        # (async, muze se delat pred/behem zmensovani fotky -> v tu dobu jeste neexistuje webp)
+        .write_to_file(quality=80)
+        .execute()
+    )
 
     # TODO: doresit uklid JPGu -> jsou zbytecne
 
+    if not photo_id:
+        # profilove obrazky uzivatele nemaji zaznam v tabulce photo
+        return
+
     async with get_session() as db:
+        photo = await add_to_variants_manifest(db, photo_id, {"photo": f"{name}.webp"})
         await models.Photo.update(
             db,
-            id=photo_id,
+            obj=photo,
             data={
-                "width": width,
-                "height": height,
+                "width": result.width,
+                "height": result.height,
                 "filename_extension": "webp",
                 "cache_key": int(time())
             })
 
 
-async def generate_thumbnail(path: str, filename: str):
-    editor = PhotoEditor(path, filename)
-    editor.resize(new_width=300)
-
+async def generate_variants(path: str, filename: str, photo_id: Optional[int] = None):
+    """Nahled a responzivni varianty fotky (PHOTO_VARIANT_WIDTHS x PHOTO_VARIANT_FORMATS) z jednoho nacteni."""
     name, _ = os.path.splitext(filename)
-    editor.write_to_file(
-        quality=85,
-        dest_path=f"{path}/thumbs",
-        dest_filename=f"{name}.webp",
-        format_="webp")
+    result = await (
+        PhotoPipeline(path, filename)
+        .write_variants(PHOTO_VARIANT_WIDTHS, PHOTO_VARIANT_FORMATS, dest_path=f"{path}/variants", name=name)
+        .resize(new_width=300)
+        .write_to_file(
+            quality=85,
+            dest_path=f"{path}/thumbs",
+            dest_filename=f"{name}.webp",
+            format_="webp")
+        .execute()
+    )
+    variants, _ = result.outputs
+
+    if photo_id:
+        await record_photo_variants(
+            photo_id,
+            thumbnail=f"thumbs/{name}.webp",
+            variants=[{**variant, "filename": f"variants/{variant['filename']}"} for variant in variants],
+        )
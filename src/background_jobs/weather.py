@@ -6,19 +6,14 @@ from external.weather import weather_api
 from logger import log
 
 
-async def download_weather(date_time: datetime, flight_id: int, airport_id: int, type_: Literal['landing', 'takeoff']):
-    async with get_session() as db:
-        airport = await models.Airport.get_one(db, airport_id)
-        gps = (airport.gps_latitude, airport.gps_longitude)
+def get_weather_datetime(date_time: datetime) -> datetime:
+    """Flight time in the local time zone, its day and hour pick the weather (naive times are taken as local)."""
+    return date_time.astimezone()
 
-    try:
-        weather = await weather_api.get_weather_for_hour(date_time.astimezone(), gps=gps)
-        log.warning(weather)
-    except Exception as e:
-        log.error(f"Error in downloading weather: {e}")
-        return None
 
-    data = {
+def get_weather_info_data(weather: dict) -> dict:
+    """`WeatherInfo` columns from the values of `weather_api.get_weather_for_hour`."""
+    return {
         "datetime": weather['datetime'],
         "qnh": weather['pressure_msl'],
         "temperature_surface": weather['temperature_2m'],
@@ -30,6 +25,21 @@ async def download_weather(date_time: datetime, flight_id: int, airport_id: int,
         "wind_direction_surface": weather['winddirection_10m'],
     }
 
+
+async def download_weather(date_time: datetime, flight_id: int, airport_id: int, type_: Literal['landing', 'takeoff']):
+    async with get_session() as db:
+        airport = await models.Airport.get_one(db, airport_id)
+        gps = (airport.gps_latitude, airport.gps_longitude)
+
+    try:
+        weather = await weather_api.get_weather_for_hour(get_weather_datetime(date_time), gps=gps)
+        log.warning(weather)
+    except Exception as e:
+        log.error(f"Error in downloading weather: {e}")
+        return None
+
+    data = get_weather_info_data(weather)
+
     async with get_session() as db:
         flight = await models.Flight.get_one(db, flight_id)
         existing_weather_id = getattr(flight, f'{type_}_weather_info_id')
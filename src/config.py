@@ -8,8 +8,48 @@ REFRESH_TOKEN_VALIDITY_DAYS = 30
 API_URL = os.environ.get("API_URL") or "http://localhost:8000"
 ALLOW_CORS_ORIGINS = os.environ.get("ALLOW_CORS_ORIGINS", "").split()
 SENTRY_DSN = os.environ.get("SENTRY_DSN")
+# /metrics vyzaduje "Authorization: Bearer <token>", bez nastaveneho tokenu je vypnute (404)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
 
 APP_SECRET_KEY = os.environ.get("APP_SECRET_KEY") or "test"
 
 if not APP_SECRET_KEY:
     raise ValueError("Missing APP_SECRET_KEY!")
+
+# letiste pro odhad z GPX se drzi v pameti, po tolika sekundach se nactou znovu (kvuli importum primo do DB)
+AIRPORT_INDEX_TTL = int(os.environ.get("AIRPORT_INDEX_TTL") or 600)
+
+# jmena zaznamu z comboboxu (letiste, POI, kopiloti, letadla) v pameti - max. pocet jmen a platnost v sekundach
+COMBOBOX_NAME_INDEX_SIZE = int(os.environ.get("COMBOBOX_NAME_INDEX_SIZE") or 200000)
+COMBOBOX_NAME_INDEX_TTL = int(os.environ.get("COMBOBOX_NAME_INDEX_TTL") or 300)
+
+# clenstvi uzivatelu v organizacich (GraphQL context), v sekundach; zmeny v tomto procesu se projevi hned
+ORGANIZATION_IDS_CACHE_TTL = int(os.environ.get("ORGANIZATION_IDS_CACHE_TTL") or 300)
+
+# bcrypt cost (2^rounds iteraci), hesla s jinym cost se prehashuji pri prihlaseni
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get("PASSWORD_BCRYPT_ROUNDS") or 12)
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS") or 2)
+PASSWORD_HASHING_QUEUE_SIZE = int(os.environ.get("PASSWORD_HASHING_QUEUE_SIZE") or 16)
+
+# DEM dlazdice .hgt (SRTM/Copernicus) pro vysku terenu, co v nich neni, se dotahuje z open-elevation API
+ELEVATION_SRTM_PATH = os.environ.get("ELEVATION_SRTM_PATH", "/app/uploads/srtm")
+ELEVATION_HTTP_FALLBACK = os.environ.get("ELEVATION_HTTP_FALLBACK", "1") == "1"
+# open-elevation API: bodu v jednom dotazu, soubeznych dotazu (na proces), opakovani po chybe, timeout v sekundach
+ELEVATION_API_CHUNK_SIZE = int(os.environ.get("ELEVATION_API_CHUNK_SIZE") or 200)
+ELEVATION_API_CONCURRENCY = int(os.environ.get("ELEVATION_API_CONCURRENCY") or 2)
+ELEVATION_API_RETRIES = int(os.environ.get("ELEVATION_API_RETRIES") or 3)
+ELEVATION_API_TIMEOUT = int(os.environ.get("ELEVATION_API_TIMEOUT") or 30)
+
+# pocasi za posledni dny (z forecast API) se jeste meni, v cache plati tolik sekund; starsi dny plati navzdy
+WEATHER_CACHE_RECENT_TTL = int(os.environ.get("WEATHER_CACHE_RECENT_TTL") or 6 * 3600)
+
+IMAGE_PROCESSING_WORKERS = int(os.environ.get("IMAGE_PROCESSING_WORKERS") or 2)
+IMAGE_PROCESSING_QUEUE_SIZE = int(os.environ.get("IMAGE_PROCESSING_QUEUE_SIZE") or 8)
+
+# editor preview: decoded 900px base images and encoded previews, both per process
+PHOTO_PREVIEW_BASE_CACHE_MB = int(os.environ.get("PHOTO_PREVIEW_BASE_CACHE_MB") or 128)
+PHOTO_PREVIEW_CACHE_MB = int(os.environ.get("PHOTO_PREVIEW_CACHE_MB") or 32)
+
+# responzivni varianty fotek (sirky v px), AVIF se vynecha, pokud ho Pillow neumi
+PHOTO_VARIANT_WIDTHS = [int(width) for width in (os.environ.get("PHOTO_VARIANT_WIDTHS") or "300 640 1280 2500").split()]
+PHOTO_VARIANT_FORMATS = (os.environ.get("PHOTO_VARIANT_FORMATS") or "webp").split()
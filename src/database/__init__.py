@@ -1,6 +1,7 @@
 __all__ = [
     'async_session',
-    'engine'
+    'engine',
+    'replicas',
 ]
 
-from database.config import async_session, engine
+from database.config import async_session, engine, replicas
@@ -1,21 +1,61 @@
 import os
+from typing import Optional
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from database.pool import InstrumentedPool
+from database.routing import ReplicaSet, RoutingSession
 
+# pool je v kazdem procesu (uvicorn worker) zvlast: workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) < max_connections
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE") or 5)
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW") or 10)
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT") or 30)
+# kratsi nez wait_timeout MariaDB, jinak server spojeni zavre driv
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE") or 3600)
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+DB_ECHO = os.environ.get("DB_ECHO", "0") == "1"
 
-def get_database_url():
+# read repliky pro GraphQL query ("host[:port] ..."), stejny uzivatel i databaze jako primary
+MYSQL_REPLICA_HOSTS = os.environ.get("MYSQL_REPLICA_HOSTS", "").split()
+# nedostupna replika se po tolika sekundach zkusi znovu
+DB_REPLICA_RETRY_AFTER = int(os.environ.get("DB_REPLICA_RETRY_AFTER") or 30)
+# klient po mutaci cte tak dlouho z primary (cookie), aby videl svoje zmeny i se zpozdenim replikace
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get("DB_REPLICA_STICKY_SECONDS") or 10)
+
+
+def get_database_url(host: Optional[str] = None):
     user = os.environ.get("MYSQL_USER", "root")
     password = os.environ.get("MYSQL_PASSWORD", "")
-    host = os.environ.get("MYSQL_HOST", "db")
+    host = host or os.environ.get("MYSQL_HOST", "db")
     port = int(os.environ.get("MYSQL_PORT", 3306))
     database = os.environ.get("MYSQL_DATABASE", "ull_tracker")
 
+    if ":" in host:
+        host, port = host.split(":")
+
     return f'mysql+aiomysql://{user}:{password}@{host}:{port}/{database}?charset=utf8'
 
 
-def create_db_engine():
-    database_url = get_database_url()
-    return create_async_engine(database_url, future=True, echo=True, pool_pre_ping=True)
+def create_db_engine(database_url: Optional[str] = None):
+    database_url = database_url or get_database_url()
+    return create_async_engine(
+        database_url,
+        future=True,
+        echo=DB_ECHO,
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
 
 
 engine = create_db_engine()
-async_session = async_sessionmaker(engine, expire_on_commit=True, class_=AsyncSession)
+
+replicas = ReplicaSet(retry_after=DB_REPLICA_RETRY_AFTER)
+for replica_host in MYSQL_REPLICA_HOSTS:
+    replicas.add(create_db_engine(get_database_url(replica_host)))
+RoutingSession.replicas = replicas
+
+async_session = async_sessionmaker(
+    engine, expire_on_commit=True, class_=AsyncSession, sync_session_class=RoutingSession
+)
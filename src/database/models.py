@@ -1,9 +1,13 @@
 from __future__ import annotations
 import datetime
 from typing import Set, List
-from sqlalchemy import String, DateTime, ForeignKey, Text, Integer, func, Table, Column, Boolean, select, Float, Enum
+from sqlalchemy import (
+    String, DateTime, Date, ForeignKey, Text, Integer, func, Table, Column, Boolean, select, Float, Enum, Index, JSON,
+    UniqueConstraint, event, inspect
+)
 from sqlalchemy.orm import Mapped, relationship, as_declarative, mapped_column
 from sqlalchemy.ext.asyncio import AsyncSession
+from utils.text import normalize_name
 
 
 @as_declarative()
@@ -43,6 +47,30 @@ class BaseModel:
         return obj
 
 
+class NormalizedNameMixin:
+    """
+    Records picked in comboboxes by name. `normalized_name` is computed from `normalized_name_source` on every save and
+    is unique per user among not deleted records, so a name typed again resolves to the existing record
+    (see `helpers/combobox.py`).
+    """
+    normalized_name_source = "name"
+
+    normalized_name: Mapped[str] = mapped_column(String(128), nullable=True)
+
+
+@event.listens_for(NormalizedNameMixin, "before_insert", propagate=True)
+def set_normalized_name_on_insert(mapper, connection, target: NormalizedNameMixin):
+    target.normalized_name = None if target.deleted else normalize_name(getattr(target, target.normalized_name_source))
+
+
+@event.listens_for(NormalizedNameMixin, "before_update", propagate=True)
+def set_normalized_name_on_update(mapper, connection, target: NormalizedNameMixin):
+    # smazane zaznamy jmeno neblokuji; jinak jen pri zmene jmena, at jde upravit i neslouceny duplikat
+    state = inspect(target)
+    if state.attrs.deleted.history.has_changes() or state.attrs[target.normalized_name_source].history.has_changes():
+        set_normalized_name_on_insert(mapper, connection, target)
+
+
 user_is_in_organization = Table(
     "user_is_in_organization",
     BaseModel.metadata,
@@ -65,8 +93,12 @@ copilot_has_photo = Table(
 )
 
 
-class Airport(BaseModel):
+class Airport(NormalizedNameMixin, BaseModel):
     __tablename__ = "airport"
+    __table_args__ = (
+        UniqueConstraint("created_by_id", "normalized_name", name="uq_airport_created_by_normalized_name"),
+    )
+    normalized_name_source = "icao_code"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -85,8 +117,13 @@ class Airport(BaseModel):
     created_by: Mapped['User'] = relationship()
 
 
-class PointOfInterestType(BaseModel):
+class PointOfInterestType(NormalizedNameMixin, BaseModel):
     __tablename__ = "point_of_interest_type"
+    __table_args__ = (
+        UniqueConstraint(
+            "created_by_id", "normalized_name", name="uq_point_of_interest_type_created_by_normalized_name"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -100,8 +137,12 @@ class PointOfInterestType(BaseModel):
     points_of_interest: Mapped[List[PointOfInterest]] = relationship()
 
 
-class PointOfInterest(BaseModel):
+class PointOfInterest(NormalizedNameMixin, BaseModel):
     __tablename__ = "point_of_interest"
+    __table_args__ = (
+        UniqueConstraint("created_by_id", "normalized_name", name="uq_point_of_interest_created_by_normalized_name"),
+        Index("ix_point_of_interest_created_by_name", "created_by_id", "name", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -123,6 +164,9 @@ class PointOfInterest(BaseModel):
 
 class Photo(BaseModel):
     __tablename__ = "photo"
+    __table_args__ = (
+        Index("ix_photo_flight_exposed_at", "flight_id", "exposed_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False, server_default="")
@@ -132,6 +176,8 @@ class Photo(BaseModel):
     cache_key: Mapped[str] = mapped_column(String(128), nullable=True)
     width: Mapped[int] = mapped_column(Integer, nullable=False)
     height: Mapped[int] = mapped_column(Integer, nullable=False)
+    # vygenerovane soubory fotky (relativne k adresari letu), napr. {"photo": "a.webp", "thumbnail": "thumbs/a.webp"}
+    variants_manifest: Mapped[dict] = mapped_column(JSON, nullable=True)
     exposed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     gps_latitude: Mapped[float] = mapped_column(Float, nullable=True)
     gps_longitude: Mapped[float] = mapped_column(Float, nullable=True)
@@ -171,8 +217,12 @@ class PhotoAdjustment(BaseModel):
     photo: Mapped['Photo'] = relationship()
 
 
-class Aircraft(BaseModel):
+class Aircraft(NormalizedNameMixin, BaseModel):
     __tablename__ = "aircraft"
+    __table_args__ = (
+        UniqueConstraint("created_by_id", "normalized_name", name="uq_aircraft_created_by_normalized_name"),
+    )
+    normalized_name_source = "call_sign"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     call_sign: Mapped[str] = mapped_column(String(16), nullable=False)
@@ -236,6 +286,28 @@ class FlightTrack(BaseModel):
     airport: Mapped['Airport'] = relationship()
 
 
+class FlightTrackStats(BaseModel):
+    __tablename__ = "flight_track_stats"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    flight_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("flight.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    points_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    distance: Mapped[float] = mapped_column(Float, nullable=False)
+    duration: Mapped[int] = mapped_column(Integer, nullable=True)
+    time_aloft: Mapped[int] = mapped_column(Integer, nullable=True)
+    max_speed: Mapped[float] = mapped_column(Float, nullable=True)
+    avg_speed: Mapped[float] = mapped_column(Float, nullable=True)
+    max_altitude: Mapped[float] = mapped_column(Float, nullable=True)
+    avg_altitude: Mapped[float] = mapped_column(Float, nullable=True)
+    max_climb_rate: Mapped[float] = mapped_column(Float, nullable=True)
+    max_sink_rate: Mapped[float] = mapped_column(Float, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    flight: Mapped['Flight'] = relationship()
+
+
 class WeatherInfo(BaseModel):
     __tablename__ = "weather_info"
 
@@ -251,8 +323,33 @@ class WeatherInfo(BaseModel):
     datetime: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
 
+class WeatherCache(BaseModel):
+    """Hourly weather of one day from open-meteo, coordinates in hundredths of a degree (see `Weather`)."""
+    __tablename__ = "weather_cache"
+
+    lat_e2: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    lng_e2: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    date: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    hourly: Mapped[dict] = mapped_column(JSON, nullable=False)
+    downloaded_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ElevationCache(BaseModel):
+    """Terrain elevation from the elevation API, coordinates in millionths of a degree (the precision of the API)."""
+    __tablename__ = "elevation_cache"
+
+    lat_e6: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    lng_e6: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    elevation: Mapped[float] = mapped_column(Float, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
 class Event(BaseModel):
     __tablename__ = "event"
+    __table_args__ = (
+        Index("ix_event_created_by_date_from", "created_by_id", "date_from", "id"),
+        Index("ix_event_public_date_from", "is_public", "date_from", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -272,6 +369,10 @@ class Event(BaseModel):
 
 class Flight(BaseModel):
     __tablename__ = "flight"
+    __table_args__ = (
+        Index("ix_flight_created_by_takeoff", "created_by_id", "takeoff_datetime", "id"),
+        Index("ix_flight_public_takeoff", "is_public", "takeoff_datetime", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False, server_default="")
@@ -309,8 +410,11 @@ class Flight(BaseModel):
     title_photo: Mapped['Photo'] = relationship(foreign_keys=[title_photo_id])
 
 
-class Copilot(BaseModel):
+class Copilot(NormalizedNameMixin, BaseModel):
     __tablename__ = "copilot"
+    __table_args__ = (
+        UniqueConstraint("created_by_id", "normalized_name", name="uq_copilot_created_by_normalized_name"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -0,0 +1,57 @@
+import time
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Counters of a connection pool since the start of the process."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def record_checkout(self, wait_time: float):
+        self.checkouts += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool measuring how long requests wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_stats = PoolStats()
+
+    def recreate(self):
+        # `engine.dispose()` vytvori novy pool, statistiky zustanou
+        pool = super().recreate()
+        pool.pool_stats = self.pool_stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except TimeoutError:
+            self.pool_stats.timeouts += 1
+            raise
+
+        self.pool_stats.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def stats(self) -> dict:
+        pool_stats = self.pool_stats
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": pool_stats.checkouts,
+            "timeouts": pool_stats.timeouts,
+            "avg_wait_time": round(pool_stats.total_wait_time / pool_stats.checkouts, 4) if pool_stats.checkouts else 0,
+            "max_wait_time": round(pool_stats.max_wait_time, 4),
+        }
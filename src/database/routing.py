@@ -0,0 +1,68 @@
+import itertools
+import time
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+
+class ReplicaSet:
+    """
+    Read replicas picked round-robin. A replica whose connection failed is skipped for `retry_after` seconds, then
+    it gets requests again (the next failure skips it again). With no healthy replica reads go to the primary.
+    """
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        self.engines: List[AsyncEngine] = []
+        self._down_until = {}
+        self._next = itertools.count()
+
+    def add(self, engine: AsyncEngine):
+        self.engines.append(engine)
+        event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, sync_engine):
+        self._down_until[sync_engine] = time.monotonic() + self.retry_after
+
+    def is_healthy(self, engine: AsyncEngine) -> bool:
+        return self._down_until.get(engine.sync_engine, 0) <= time.monotonic()
+
+    def pick(self) -> Optional[AsyncEngine]:
+        start = next(self._next)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+
+        return None
+
+    def stats(self) -> list:
+        return [
+            {"url": engine.url.render_as_string(), "healthy": self.is_healthy(engine), "pool": engine.pool.stats()}
+            for engine in self.engines
+        ]
+
+
+class RoutingSession(Session):
+    """
+    Session sending statements to a read replica when created with `info={"read_only": True}` (GraphQL queries),
+    everything else to the primary. One replica is kept for the whole session, so it reads a single snapshot.
+    """
+
+    replicas: Optional[ReplicaSet] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get("read_only") and not self._flushing and self.replicas:
+            if "replica" not in self.info:
+                replica = self.replicas.pick()
+                self.info["replica"] = replica.sync_engine if replica else None
+
+            if self.info["replica"] is not None:
+                return self.info["replica"]
+
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
@@ -1,18 +1,140 @@
+import asyncio
+import inspect
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
 from database import async_session
+from logger import log
+
+
+async def _run_callback(callback: Callable[[], Any]):
+    result = callback()
+    if inspect.isawaitable(result):
+        await result
+
+
+class RequestSession:
+    """
+    One session for a whole GraphQL request, used by `get_session()` in all resolvers and dataloaders of the request.
+    Fields are resolved concurrently but AsyncSession can't run two statements at once, so every DB call goes through
+    a lock. With `transactional` (mutations) the request is a single transaction, committed by whoever opened it.
+    `read_only` sessions read from a replica, if there is any (see `RoutingSession`).
+    """
+
+    def __init__(self, transactional: bool, read_only: bool = False):
+        self.session = async_session(info={"read_only": read_only})
+        self.transactional = transactional
+        self._lock = asyncio.Lock()
+        self._after_commit: List[Callable[[], Any]] = []
+
+    def __getattr__(self, name):
+        # synchronni metody (add, expunge, ...) jdou rovnou do session
+        return getattr(self.session, name)
+
+    async def _locked(self, method: str, *args, **kwargs):
+        async with self._lock:
+            return await getattr(self.session, method)(*args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return await self._locked("execute", *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await self._locked("scalars", *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await self._locked("scalar", *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await self._locked("get", *args, **kwargs)
+
+    async def flush(self, *args, **kwargs):
+        return await self._locked("flush", *args, **kwargs)
+
+    async def delete(self, *args, **kwargs):
+        return await self._locked("delete", *args, **kwargs)
+
+    async def refresh(self, *args, **kwargs):
+        return await self._locked("refresh", *args, **kwargs)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        async with self._lock:
+            transaction = await self.session.begin_nested()
+
+        try:
+            yield transaction
+        except BaseException:
+            async with self._lock:
+                await transaction.rollback()
+            raise
+
+        async with self._lock:
+            await transaction.commit()
+
+    def add_after_commit(self, callback: Callable[[], Any]):
+        self._after_commit.append(callback)
+
+    async def finish(self, commit: bool):
+        committed = False
+        try:
+            if commit and self.transactional:
+                await self.session.commit()
+                committed = True
+            else:
+                await self.session.rollback()
+        finally:
+            await self.session.close()
+
+        if not committed:
+            return
+
+        # data uz jsou zapsana, chyba callbacku transakci nezrusi
+        for callback in self._after_commit:
+            try:
+                await _run_callback(callback)
+            except Exception:
+                log.exception("After commit callback failed")
+
+
+current_request_session: ContextVar[Optional[RequestSession]] = ContextVar("current_request_session", default=None)
 
 
 @asynccontextmanager
 async def get_session():
+    request_session = current_request_session.get()
+    if request_session is not None:
+        yield request_session
+        return
+
     async with async_session() as session:
-        async with session.begin():
-            try:
+        try:
+            async with session.begin():
                 yield session
-                await session.commit()
-            except Exception as e:
-                await session.rollback()
-                print(f"ERROR: {e}")
-                raise
-            finally:
-                session.expunge_all()
-                await session.close()
+        except Exception as e:
+            print(f"ERROR: {e}")
+            raise
+
+
+async def after_commit(callback: Callable[[], Any]):
+    """
+    Runs `callback` (plain or async function) once the mutation's transaction is committed, e.g. to invalidate
+    in-memory caches so that no other request reloads and caches the old state in the meantime. Outside
+    of a transactional request session it runs right away.
+    """
+    request_session = current_request_session.get()
+    if request_session is not None and request_session.transactional:
+        request_session.add_after_commit(callback)
+    else:
+        await _run_callback(callback)
+
+
+@asynccontextmanager
+async def request_session_scope(transactional: bool, read_only: bool = False):
+    """Makes `get_session()` return one shared session until the end of the block (i.e. of a GraphQL request)."""
+    request_session = RequestSession(transactional, read_only)
+    token = current_request_session.set(request_session)
+    try:
+        yield request_session
+    finally:
+        current_request_session.reset(token)
+        await request_session.session.close()
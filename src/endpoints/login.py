@@ -1,11 +1,11 @@
 from fastapi import HTTPException
 from fastapi_jwt import JwtAuthorizationCredentials
-from passlib.hash import bcrypt
-from sqlalchemy import select
+from sqlalchemy import select, update
 from starlette.responses import Response
 from database.models import User
 from database.transaction import get_session
 from endpoints.base import AuthEndpoint
+from utils.password import hash_password, needs_rehash, verify_password
 from pydantic import BaseModel
 
 
@@ -26,9 +26,12 @@ class LoginEndpoint(AuthEndpoint):
             user = logged_user.as_dict()
             password_hashed = logged_user.password_hashed
 
-        if not bcrypt.verify(user_data.password, password_hashed):
+        if not await verify_password(user_data.password, password_hashed):
             raise HTTPException(status_code=401, detail="Bad username or password")
 
+        if needs_rehash(password_hashed):
+            await self.rehash_password(user['id'], user_data.password)
+
         subject = {"id": user['id'], "email": user['email']}
         access_token = self.access_security.create_access_token(subject=subject)
         refresh_token = self.refresh_security.create_refresh_token(subject=subject)
@@ -44,6 +47,13 @@ class LoginEndpoint(AuthEndpoint):
             "access_token": access_token
         }
 
+    @staticmethod
+    async def rehash_password(user_id: int, password: str):
+        # zmenil se cost - heslo zname jen ted, tak se rovnou ulozi novy hash
+        password_hashed = await hash_password(password)
+        async with get_session() as db:
+            await db.execute(update(User).filter_by(id=user_id).values(password_hashed=password_hashed))
+
 
 class LogoutEndpoint(AuthEndpoint):
     async def on_post(self, resp: Response):
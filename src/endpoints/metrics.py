@@ -0,0 +1,32 @@
+import hmac
+from typing import Optional
+from fastapi import HTTPException
+from config import METRICS_TOKEN
+from database import engine, replicas
+from endpoints import photo_editor_preview
+from graphql_schema.entities.helpers.name_index import name_index
+from utils.image import image_executor
+from utils.password import password_executor
+
+
+class MetricsEndpoint:
+    """Pool, executor and cache statistics of this process (every uvicorn worker has its own)."""
+
+    async def get(self, authorization: Optional[str] = None) -> dict:
+        if not METRICS_TOKEN:
+            raise HTTPException(status_code=404, detail="Not found")
+        if not hmac.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+        return {
+            "db_pool": engine.pool.stats(),
+            "db_replicas": replicas.stats(),
+            "executors": {
+                executor.name: executor.stats() for executor in (image_executor, password_executor)
+            },
+            "caches": {
+                "photo_preview_base_images": photo_editor_preview.base_images.stats(),
+                "photo_previews": photo_editor_preview.previews.stats(),
+                "combobox_names": name_index.cache.stats(),
+            },
+        }
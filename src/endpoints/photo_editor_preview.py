@@ -1,15 +1,109 @@
-import os.path
+import asyncio
+import hashlib
+import os
+from typing import Optional, Tuple, Any, Dict
 from sqlalchemy import select
-from starlette.responses import StreamingResponse
+from starlette.responses import Response
+from config import PHOTO_PREVIEW_BASE_CACHE_MB, PHOTO_PREVIEW_CACHE_MB
 from database import models
 from database.transaction import get_session
 from endpoints.base import AuthEndpoint
-from paths import get_photo_basepath
-from utils.image import PhotoEditor
+from paths import get_photo_basepath, get_photo_filename
+from utils.image import PhotoPipeline, RawImage
+from utils.lru_cache import LRUCache
+
+PREVIEW_HEIGHT = 900
+
+Operations = Tuple[Tuple[str, Tuple[Tuple[str, Any], ...]], ...]
+
+# decoded PREVIEW_HEIGHT px images keyed by (photo ID, version) - slider moves start from these, not from the original
+base_images = LRUCache(PHOTO_PREVIEW_BASE_CACHE_MB * 1024 * 1024, sizeof=lambda raw: len(raw.data))
+# encoded JPEG previews keyed by (photo ID, version, operations)
+previews = LRUCache(PHOTO_PREVIEW_CACHE_MB * 1024 * 1024, sizeof=len)
+
+_base_images_in_progress: Dict[tuple, asyncio.Future] = {}
+
+
+def compile_operations(params: dict) -> Operations:
+    """
+    Normalized operations for the preview, in the order they are applied. Values are rounded to what makes
+    a visible difference and neutral operations are left out, so equal-looking previews share the cache key.
+    """
+    operations = []
+
+    rotate = round(params.get("rotate") or 0, 1)
+    if rotate:
+        operations.append(("rotate", (("degrees", rotate), ("crop_after_rotate", True))))
+
+    crop = tuple(
+        (key.replace("crop_", ""), round(params[key], 4))
+        for key in ('crop_left', 'crop_top', 'crop_width', 'crop_height')
+        if params.get(key) is not None
+    )
+    if len(crop) == 4 and tuple(value for _, value in crop) != (0, 0, 1, 1):
+        operations.append(("crop", crop))
+
+    adjustments = tuple(
+        (key, round(params[key], 2))
+        for key in ('saturation', 'brightness', 'contrast', 'sharpness')
+        # 1.0 vraci puvodni obrazek
+        if params.get(key) is not None and round(params[key], 2) != 1
+    )
+    if adjustments:
+        operations.append(("adjust", adjustments))
+
+    return tuple(operations)
+
+
+def get_source_version(basepath: str, filename: str) -> Tuple[str, Optional[int]]:
+    """
+    Version of the file the preview is made from. `cache_key` has only second resolution, two edits in the same
+    second would share it, the mtime of the (rewritten) file changes with every edit.
+    """
+    try:
+        mtime = os.stat(f"{basepath}/{filename}").st_mtime_ns
+    except OSError:
+        mtime = None
+
+    return filename, mtime
+
+
+def get_etag(key: tuple) -> str:
+    return '"' + hashlib.sha1(repr(key).encode()).hexdigest() + '"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags or "*" in tags
+
+
+async def _load_base_image(key: tuple, basepath: str, filename: str) -> RawImage:
+    result = await PhotoPipeline(basepath, filename).resize(new_height=PREVIEW_HEIGHT).get_raw().execute()
+    raw = result.outputs[0]
+    base_images.set(key, raw)
+
+    return raw
+
+
+async def get_base_image(key: tuple, basepath: str, filename: str) -> RawImage:
+    raw = base_images.get(key)
+    if raw:
+        return raw
+
+    # soubezne pozadavky (prvni pohyby slideru) dekoduji original jen jednou
+    if key not in _base_images_in_progress:
+        future = asyncio.ensure_future(_load_base_image(key, basepath, filename))
+        future.add_done_callback(lambda _: _base_images_in_progress.pop(key, None))
+        _base_images_in_progress[key] = future
+
+    return await asyncio.shield(_base_images_in_progress[key])
 
 
 class PhotoEditorEndpoint(AuthEndpoint):
-    async def show_preview(self, photo_id: int, **kwargs):
+    async def show_preview(self, photo_id: int, if_none_match: Optional[str] = None, **kwargs):
         async with get_session() as db:
             photo = (await db.scalars(
                 select(models.Photo)
@@ -17,34 +111,27 @@ class PhotoEditorEndpoint(AuthEndpoint):
             )).one()
 
             basepath = get_photo_basepath(photo.flight_id)
-            filename = photo.filename
-
-        original_filename = '_original_' + filename
-        if os.path.exists(f"{basepath}/{original_filename}"):
-            filename = original_filename
-
-        editor = PhotoEditor(basepath, filename)
-        editor.resize(new_height=900)
-        # TODO: idealni je udelat co nejdriv resize
-        # velikost muze ovlivnit: orez, otoceni, coz jsou dve nejnarocnejsi operace...
-        # ^^ tohle by bylo fajn cachovat
-
-        if kwargs.get("rotate"):
-            editor.rotate(kwargs['rotate'], True)
-
-        crop = {
-            key.replace("crop_", ""): value
-            for key, value in kwargs.items()
-            if key in ('crop_left', 'crop_top', 'crop_width', 'crop_height') and value is not None
-        }
-        if crop and len(crop.keys()) == 4:
-            editor.crop(**crop)
-
-        adjustments = {
-            key: value for key, value in kwargs.items()
-            if key in ('saturation', 'brightness', 'contrast', 'sharpness') and value is not None
-        }
-        if adjustments:
-            editor.adjust(**adjustments)
-
-        return StreamingResponse(content=editor.get_as_stream(), media_type="image/jpeg")
+            # upravy se delaji vzdy z originalu, pokud existuje
+            filename = (photo.variants_manifest or {}).get("original") or get_photo_filename(photo)
+            version = (photo.cache_key, *get_source_version(basepath, filename))
+
+        operations = compile_operations(kwargs)
+        preview_key = (photo_id, version, operations)
+
+        headers = {"ETag": get_etag(preview_key), "Cache-Control": "private, no-cache"}
+        if etag_matches(headers["ETag"], if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        preview = previews.get(preview_key)
+        if preview is None:
+            base_image = await get_base_image((photo_id, version), basepath, filename)
+
+            editor = PhotoPipeline(basepath, filename, raw=base_image)
+            for method, arguments in operations:
+                getattr(editor, method)(**dict(arguments))
+
+            result = await editor.get_as_stream().execute()
+            preview = result.outputs[0].getvalue()
+            previews.set(preview_key, preview)
+
+        return Response(content=preview, media_type="image/jpeg", headers=headers)
@@ -5,7 +5,7 @@ from typing import Optional
 from pydantic import BaseModel, root_validator, Field
 from database.models import User
 from database.transaction import get_session
-from passlib.hash import bcrypt
+from utils.password import hash_password
 
 
 class RegistrationInput(BaseModel):
@@ -26,16 +26,21 @@ class RegistrationInput(BaseModel):
 class RegistrationEndpoint:
     async def on_post(self, user_data: RegistrationInput) -> User:
         query = select(User).filter_by(email=user_data.email)
+
         async with get_session() as db:
             existing_user = (await db.scalars(query)).first()
 
             if existing_user:
                 raise HTTPException(status_code=422, detail="User already exists")
 
+        # hashovani az po kontrole e-mailu a mimo DB session (nedrzi spojeni z poolu)
+        password_hashed = await hash_password(user_data.password)
+
+        async with get_session() as db:
             model = await User.create(db, {
                 "name": user_data.name,
                 "email": user_data.email,
-                "password_hashed": bcrypt.hash(user_data.password),
+                "password_hashed": password_hashed,
                 "description": ""
             })
             return model.as_dict()
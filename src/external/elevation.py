@@ -1,27 +1,219 @@
-from typing import List, Dict
+import asyncio
+import math
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Tuple
 import aiohttp
+import numpy as np
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.mysql import insert
+from config import (
+    ELEVATION_SRTM_PATH, ELEVATION_HTTP_FALLBACK, ELEVATION_API_CHUNK_SIZE, ELEVATION_API_CONCURRENCY,
+    ELEVATION_API_RETRIES, ELEVATION_API_TIMEOUT
+)
+from database import models
+from database.transaction import get_session
+from external.srtm import SRTMTiles
+from logger import log
 
 
-class ElevationAPI:
+class ElevationProvider(ABC):
+    """
+    Terrain elevation (m AMSL) of GPS points. The result is aligned with the input points, the elevation is None
+    where the provider does not know it.
+    """
+
+    @abstractmethod
+    async def get_elevation_for_points(self, points: List[Dict[str, float]]) -> List[dict]:
+        pass
+
+    async def close(self):
+        pass
+
+    @staticmethod
+    def _get_result(points: List[Dict[str, float]], elevation: List[Optional[float]]) -> List[dict]:
+        return [
+            {"lat": point['lat'], "lng": point['lng'], "elevation": value}
+            for point, value in zip(points, elevation)
+        ]
+
+
+class ElevationAPI(ElevationProvider):
+    """
+    open-elevation.com client. Points are looked up in `elevation_cache` first, the rest is sent in chunks of
+    `chunk_size` points, at most `concurrency` requests at once, each retried `retries` times with a backoff.
+    """
     ELEVATION_ENDPOINT = "https://api.open-elevation.com/api/v1/lookup"
+    # API pracuje s presnosti na 6 desetinnych mist, na to se zaokrouhluji i klice cache
+    PRECISION = 10 ** 6
+    RETRY_BACKOFF = 1
+    CACHE_LOOKUP_BATCH_SIZE = 1000
+
+    def __init__(self, chunk_size: int, concurrency: int, retries: int, timeout: int):
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # vytvari se az v event loopu
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    def get_key(self, point: Dict[str, float]) -> Tuple[int, int]:
+        return round(point['lat'] * self.PRECISION), round(point['lng'] * self.PRECISION)
+
+    def get_request(self, keys: List[Tuple[int, int]]):
+        return {
+            "locations": [{"latitude": lat / self.PRECISION, "longitude": lng / self.PRECISION} for lat, lng in keys]
+        }
+
+    @staticmethod
+    def _should_retry(error: Exception) -> bool:
+        # chybny dotaz (4xx) se opakovanim nespravi, rate limit (429) ano
+        return not isinstance(error, aiohttp.ClientResponseError) or error.status == 429 or error.status >= 500
+
+    async def call_api(self, keys: List[Tuple[int, int]]):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    async with self._get_session().post(self.ELEVATION_ENDPOINT, json=self.get_request(keys)) as resp:
+                        resp.raise_for_status()
+                        return await resp.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries or not self._should_retry(e):
+                    raise
+
+                delay = self.RETRY_BACKOFF * 2 ** attempt
+                log.warning(f"Elevation API failed ({type(e).__name__}: {e}), retry in {delay} s")
+                await asyncio.sleep(delay)
+
+    async def get_cached(self, keys: List[Tuple[int, int]]) -> Dict[Tuple[int, int], float]:
+        cached = {}
+        async with get_session() as db:
+            for i in range(0, len(keys), self.CACHE_LOOKUP_BATCH_SIZE):
+                rows = await db.execute(
+                    select(models.ElevationCache.lat_e6, models.ElevationCache.lng_e6, models.ElevationCache.elevation)
+                    .where(
+                        tuple_(models.ElevationCache.lat_e6, models.ElevationCache.lng_e6)
+                        .in_(keys[i:i + self.CACHE_LOOKUP_BATCH_SIZE])
+                    )
+                )
+                cached.update({(lat, lng): elevation for lat, lng, elevation in rows})
+
+        return cached
+
+    async def save_cached(self, elevation: Dict[Tuple[int, int], float]):
+        if not elevation:
+            return
+
+        query = insert(models.ElevationCache)
+        async with get_session() as db:
+            await db.execute(
+                query.on_duplicate_key_update(elevation=query.inserted.elevation),
+                [{"lat_e6": lat, "lng_e6": lng, "elevation": value} for (lat, lng), value in elevation.items()]
+            )
+
+    async def download(self, keys: List[Tuple[int, int]]) -> Dict[Tuple[int, int], float]:
+        chunks = [keys[i:i + self.chunk_size] for i in range(0, len(keys), self.chunk_size)]
+        responses = await asyncio.gather(*(self.call_api(chunk) for chunk in chunks), return_exceptions=True)
+
+        elevation = {}
+        errors = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, BaseException):
+                errors.append(response)
+                continue
 
-    def get_request(self, points: List[Dict[str, float]]):
-        return {"locations": [{"latitude": point['lat'], "longitude": point['lng']} for point in points]}
+            # vysledky jsou ve stejnem poradi jako dotaz
+            for key, location in zip(chunk, response['results']):
+                if location.get('elevation') is not None:
+                    elevation[key] = location['elevation']
 
-    async def call_api(self, points: List[Dict[str, float]]):
-        async with aiohttp.ClientSession() as session:
-            async with session.post(self.ELEVATION_ENDPOINT, json=self.get_request(points)) as resp:
-                resp.raise_for_status()
-                return await resp.json()
+        # i kdyz cast selhala, stazene body se ulozi, pri dalsim pokusu uz se stahovat nebudou
+        await self.save_cached(elevation)
+        if errors:
+            raise errors[0]
+
+        return elevation
+
+    async def get_elevation_for_points(self, points: List[Dict[str, float]]) -> List[dict]:
+        keys = [self.get_key(point) for point in points]
+        unique_keys = list(dict.fromkeys(keys))
+
+        elevation = await self.get_cached(unique_keys)
+        missing = [key for key in unique_keys if key not in elevation]
+        if missing:
+            elevation.update(await self.download(missing))
+
+        return self._get_result(points, [elevation.get(key) for key in keys])
+
+
+class SRTMElevationProvider(ElevationProvider):
+    def __init__(self, directory: str):
+        self.tiles = SRTMTiles(directory)
+
+    async def get_elevation_for_points(self, points: List[Dict[str, float]]) -> List[dict]:
+        lat = np.fromiter((point['lat'] for point in points), dtype="f8", count=len(points))
+        lng = np.fromiter((point['lng'] for point in points), dtype="f8", count=len(points))
+        elevation = await asyncio.to_thread(self.tiles.get_elevation, lat, lng)
+        elevation = [None if math.isnan(value) else round(value, 1) for value in elevation.tolist()]
+
+        return self._get_result(points, elevation)
+
+
+class FallbackElevationProvider(ElevationProvider):
+    """Asks the providers in order, each one only for the points the previous ones did not know."""
+
+    def __init__(self, *providers: ElevationProvider):
+        self.providers = providers
+
+    async def close(self):
+        for provider in self.providers:
+            await provider.close()
 
     async def get_elevation_for_points(self, points: List[Dict[str, float]]) -> List[dict]:
-        response = await self.call_api(points)
+        elevation = [None] * len(points)
+        missing = list(range(len(points)))
+
+        for position, provider in enumerate(self.providers):
+            if not missing:
+                break
+
+            try:
+                result = await provider.get_elevation_for_points([points[i] for i in missing])
+            except Exception as e:
+                if position == len(self.providers) - 1:
+                    raise
+                log.warning(f"Elevation provider {type(provider).__name__} failed: {e}")
+                continue
+
+            for i, point in zip(missing, result):
+                elevation[i] = point['elevation']
+            missing = [i for i in missing if elevation[i] is None]
+
+        return self._get_result(points, elevation)
+
+
+def create_elevation_provider() -> ElevationProvider:
+    providers = []
+    if ELEVATION_SRTM_PATH:
+        providers.append(SRTMElevationProvider(ELEVATION_SRTM_PATH))
+    if ELEVATION_HTTP_FALLBACK or not providers:
+        providers.append(ElevationAPI(
+            chunk_size=ELEVATION_API_CHUNK_SIZE,
+            concurrency=ELEVATION_API_CONCURRENCY,
+            retries=ELEVATION_API_RETRIES,
+            timeout=ELEVATION_API_TIMEOUT,
+        ))
 
-        return [{
-            "lat": loc['latitude'],
-            "lng": loc['longitude'],
-            "elevation": loc['elevation']
-        } for loc in response['results']]
+    return providers[0] if len(providers) == 1 else FallbackElevationProvider(*providers)
 
 
-elevation_api = ElevationAPI()
+elevation_api = create_elevation_provider()
@@ -1,61 +1,113 @@
+import math
+from array import array
 from datetime import datetime
-from typing import List, Dict
+from functools import cached_property
+from typing import List, Dict, Optional
 
-from aiocache import cached
 from lxml import etree
 from lxml.etree import _ElementTree
 
+TRACK_COLUMNS = ("lat", "lng", "time", "speed", "altitude", "terrain_elevation", "magnetic_variation")
+
+# element v trkpt (nebo v jeho extensions) -> sloupec
+TRACK_VALUE_TAGS = {
+    "speed": "speed",
+    "ele": "altitude",
+    "terrain_elevation": "terrain_elevation",
+    "magvar": "magnetic_variation",
+}
+
 
 class GPXParser:
+    """
+    Track points are read by a streaming parser in a single pass - every point is processed as soon as it is parsed
+    and dropped right after, so memory stays flat even for tens of MB long tracks. The element tree is loaded
+    only when the modified track is written (`write`).
+    """
+
     def __init__(self, file: str):
         self.file = file
-        self.gpx = etree.parse(self.file)
         self.namespace = None
         self.precision_digits = 6
-        self.set_namespace()
+        self._columns: Optional[Dict[str, array]] = None
 
-    def set_namespace(self):
-        namespace = self.gpx.getroot().nsmap.get(None)
-        self.namespace = {'gpx': namespace}
+    @cached_property
+    def gpx(self) -> _ElementTree:
+        gpx = etree.parse(self.file)
+        self.namespace = {'gpx': gpx.getroot().nsmap.get(None)}
+
+        return gpx
 
     def run_xpath(self, path: str):
-        return self.gpx.xpath(path, namespaces=self.namespace)
+        gpx = self.gpx
+        return gpx.xpath(path, namespaces=self.namespace)
+
+    def _parse_track_columns(self) -> Dict[str, array]:
+        columns = {column: array("d") for column in TRACK_COLUMNS}
+        nan = math.nan
+
+        for _, node in etree.iterparse(self.file, events=("end",), tag="{*}trkpt"):
+            values = dict.fromkeys(TRACK_VALUE_TAGS.values(), nan)
+            timestamp = nan
+
+            for child in node.iter(etree.Element):
+                if not child.text:
+                    continue
+
+                tag = child.tag.rpartition("}")[2]
+                if tag == "time":
+                    timestamp = datetime.fromisoformat(child.text).timestamp()
+                elif tag in TRACK_VALUE_TAGS:
+                    values[TRACK_VALUE_TAGS[tag]] = float(child.text)
+
+            columns["lat"].append(float(node.attrib["lat"]))
+            columns["lng"].append(float(node.attrib["lon"]))
+            columns["time"].append(timestamp)
+            for column, value in values.items():
+                columns[column].append(value)
 
-    @cached()
-    async def get_times(self):
-        nodes = self.run_xpath("//gpx:trkpt/gpx:time")
-        return [datetime.fromisoformat(node.text).astimezone() for node in nodes]
+            # zpracovany bod uz neni potreba - uvolnit ho i s predchozimi sourozenci
+            node.clear()
+            while node.getprevious() is not None:
+                del node.getparent()[0]
+
+        return columns
+
+    def get_track_columns(self) -> Dict[str, array]:
+        """
+        All values of track points, a column per value. Missing values are NaN, so the columns are aligned
+        by track point. Time is a UNIX timestamp.
+        """
+        if self._columns is None:
+            self._columns = self._parse_track_columns()
+
+        return self._columns
+
+    def _get_values(self, column: str) -> List[float]:
+        return [value for value in self.get_track_columns()[column] if not math.isnan(value)]
+
+    async def get_times(self) -> List[datetime]:
+        return [datetime.fromtimestamp(timestamp).astimezone() for timestamp in self._get_values("time")]
 
-    @cached()
     async def get_coordinates(self) -> List[Dict[str, float]]:
-        nodes = self.run_xpath("//gpx:trkpt")
-        return [{"lat": float(node.attrib["lat"]), "lng": float(node.attrib['lon'])} for node in nodes]
+        columns = self.get_track_columns()
+        return [{"lat": lat, "lng": lng} for lat, lng in zip(columns["lat"], columns["lng"])]
 
-    @cached()
-    async def get_speed(self) -> List[int]:
-        nodes = self.run_xpath("//gpx:speed")
-        return [int(node.text) for node in nodes]
+    async def get_speed(self) -> List[float]:
+        return self._get_values("speed")
 
-    @cached()
-    async def get_magnetic_variation(self) -> List[int]:
-        nodes = self.run_xpath("//gpx:magvar")
-        return [int(node.text) for node in nodes]
+    async def get_magnetic_variation(self) -> List[float]:
+        return self._get_values("magnetic_variation")
 
-    @cached()
     async def get_altitude(self) -> List[float]:
-        nodes = self.run_xpath("//gpx:ele")
-        return [float(node.text) for node in nodes]
+        return self._get_values("altitude")
 
-    @cached()
     async def get_terrain_elevation(self) -> List[float]:
-        nodes = self.run_xpath("//gpx:terrain_elevation")
-        return [float(node.text) for node in nodes]
+        return self._get_values("terrain_elevation")
 
-    @cached()
     async def get_max_speed(self):
-        return max(await self.get_speed()) or 0
+        return max(await self.get_speed(), default=0)
 
-    @cached()
     async def get_avg_speed(self):
         speeds = await self.get_speed()
         if not speeds:
@@ -63,33 +115,48 @@ class GPXParser:
 
         return round(sum(speeds) / len(speeds), 2)
 
-    @cached()
     async def get_max_altitude(self):
-        return max(await self.get_altitude()) or 0
+        return max(await self.get_altitude(), default=0)
 
-    @cached()
     async def get_avg_altitude(self):
         altitudes = await self.get_altitude()
-        return round(sum(altitudes) / len(altitudes), 2)
-
-    def add_terrain_elevation(self, points_with_elevation: List[Dict[str, float]]):
-        track_points = self.run_xpath("//gpx:trkpt")
-        # TODO: open elevation API umi jen presnost na 6 desetinnych mist!
-        track_points_index = {(float(n.attrib['lat']), float(n.attrib['lon'])): n for n in track_points}
+        if not altitudes:
+            return 0
 
-        for point_with_elevation in points_with_elevation:
-            lat = point_with_elevation['lat']
-            lng = point_with_elevation['lng']
-            elevation = point_with_elevation['elevation']
-            target_node = track_points_index.get((lat, lng))
+        return round(sum(altitudes) / len(altitudes), 2)
 
-            if target_node is None:
+    def add_terrain_elevation(self, points_with_elevation: List[Dict[str, Optional[float]]]):
+        """
+        Sets terrain elevation of the track points, the n-th item belongs to the n-th track point (as returned
+        by `get_coordinates`). Unknown elevation (None) keeps the current value. The GPX is changed by `write`.
+        """
+        terrain_elevation = self.get_track_columns()["terrain_elevation"]
+        if len(points_with_elevation) != len(terrain_elevation):
+            raise ValueError(
+                f"Got elevation of {len(points_with_elevation)} points, the track has {len(terrain_elevation)}"
+            )
+
+        for i, point in enumerate(points_with_elevation):
+            if point['elevation'] is not None:
+                terrain_elevation[i] = point['elevation']
+
+    def _apply_terrain_elevation(self):
+        terrain_elevation = self.get_track_columns()["terrain_elevation"]
+
+        # poradi bodu odpovida sloupcum, ty se ctou ze stejneho souboru
+        for node, elevation in zip(self.gpx.iter("{*}trkpt"), terrain_elevation):
+            if math.isnan(elevation):
                 continue
 
-            extensions = target_node.find("./extensions", self.gpx.getroot().nsmap)
-            extensions.append(etree.XML(f"<terrain_elevation>{elevation}</terrain_elevation>"))
+            extensions = node.find("{*}extensions")
+            if extensions is None:
+                extensions = etree.SubElement(node, etree.QName(node, "extensions"))
 
-        return self.gpx
+            element = extensions.find("{*}terrain_elevation")
+            if element is None:
+                element = etree.SubElement(extensions, "terrain_elevation")
+            element.text = str(elevation)
 
-    def write(self, tree: _ElementTree, output: str):
-        tree.write(output)
+    def write(self, output: str):
+        self._apply_terrain_elevation()
+        self.gpx.write(output)
@@ -0,0 +1,139 @@
+import asyncio
+import glob
+import os
+from datetime import datetime
+from typing import Optional, List, Dict
+import numpy as np
+from external.gpx_parser import GPXParser, TRACK_COLUMNS
+from logger import log
+from paths import FLIGHT_GPX_TRACK_PATH
+from utils.file import delete_file
+from utils.track_simplification import get_douglas_peucker_importance, select_points
+
+# zvysit pri zmene TRACK_CACHE_COLUMNS nebo ulozeni, stare soubory se pak ignoruji a vytvori znovu
+TRACK_CACHE_VERSION = 3
+# importance - Douglas-Peucker tolerance (m), do ktere se bod jeste zobrazi, viz get_douglas_peucker_importance
+TRACK_CACHE_COLUMNS = TRACK_COLUMNS + ("importance",)
+TRACK_CACHE_COLUMN_INDEX = {column: i for i, column in enumerate(TRACK_CACHE_COLUMNS)}
+
+
+class Track:
+    """
+    Track points stored by columns - a 2-D float array (column, point) in the order of `TRACK_CACHE_COLUMNS`.
+    Every column is contiguous, so reading one column of a memory mapped cache file touches only its own pages.
+    """
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.data[TRACK_CACHE_COLUMN_INDEX[column]]
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    def select(self, indexes: np.ndarray) -> "Track":
+        return Track(self.data[:, indexes])
+
+
+def get_track_cache_path(gpx_filename: str) -> str:
+    return f"{FLIGHT_GPX_TRACK_PATH}/{gpx_filename}.v{TRACK_CACHE_VERSION}.npy"
+
+
+def parse_track(gpx_filename: str) -> Track:
+    columns = GPXParser(f"{FLIGHT_GPX_TRACK_PATH}/{gpx_filename}").get_track_columns()
+
+    track = Track(np.empty((len(TRACK_CACHE_COLUMNS), len(columns["lat"]))))
+    for column in TRACK_COLUMNS:
+        track[column][:] = columns[column]
+    track["importance"][:] = get_douglas_peucker_importance(track["lat"], track["lng"])
+
+    return track
+
+
+def save_track_cache(gpx_filename: str, track: Track):
+    path = get_track_cache_path(gpx_filename)
+
+    # zapis pres docasny soubor, aby soubezne cteni nikdy nevidelo napul zapsany soubor
+    with open(f"{path}.tmp", "wb") as f:
+        np.save(f, track.data)
+    os.replace(f"{path}.tmp", path)
+
+
+def build_track_cache(gpx_filename: str) -> Track:
+    track = parse_track(gpx_filename)
+    save_track_cache(gpx_filename, track)
+
+    return track
+
+
+def delete_track_cache(gpx_filename: str):
+    # i soubory starsich verzi
+    for path in glob.glob(f"{glob.escape(FLIGHT_GPX_TRACK_PATH)}/{glob.escape(gpx_filename)}.v*.npy"):
+        delete_file(path, silent=True)
+
+
+def _load_track_cache(gpx_filename: str) -> Track:
+    data = np.load(get_track_cache_path(gpx_filename), mmap_mode="r")
+    if data.ndim != 2 or data.shape[0] != len(TRACK_CACHE_COLUMNS):
+        raise ValueError(f"unexpected shape {data.shape}")
+
+    return Track(data)
+
+
+async def load_track(gpx_filename: str) -> Optional[Track]:
+    """
+    Track points of the GPX file by columns (NaN where the value is missing), see `Track`.
+
+    The cache file is memory mapped and stored column after column, so only the pages of the columns that are
+    actually read get loaded. When the cache does not exist yet, the GPX is parsed and the cache is created.
+    Returns None if there is no (readable) GPX file.
+    """
+    try:
+        return _load_track_cache(gpx_filename)
+    except FileNotFoundError:
+        pass
+    except ValueError as e:
+        log.warning(f"Broken track cache of {gpx_filename}, rebuilding: {e}")
+
+    try:
+        track = await asyncio.to_thread(parse_track, gpx_filename)
+    except OSError:
+        return None
+
+    try:
+        await asyncio.to_thread(save_track_cache, gpx_filename, track)
+    except OSError as e:
+        log.warning(f"Cannot write track cache of {gpx_filename}: {e}")
+
+    return track
+
+
+def simplify(track: Track, tolerance: Optional[float] = None, max_points: Optional[int] = None) -> Track:
+    if tolerance is None and max_points is None:
+        return track
+
+    return track.select(select_points(track["importance"], tolerance, max_points))
+
+
+def get_values(track: Track, column: str) -> np.ndarray:
+    values = track[column]
+    return values[~np.isnan(values)]
+
+
+def get_coordinates(track: Track) -> List[Dict[str, float]]:
+    return [{"lat": lat, "lng": lng} for lat, lng in zip(track["lat"].tolist(), track["lng"].tolist())]
+
+
+def get_times(track: Track) -> List[datetime]:
+    return [datetime.fromtimestamp(timestamp).astimezone() for timestamp in get_values(track, "time").tolist()]
+
+
+def get_max(track: Track, column: str) -> float:
+    values = get_values(track, column)
+    return float(values.max()) if len(values) else 0
+
+
+def get_avg(track: Track, column: str) -> float:
+    values = get_values(track, column)
+    return round(float(values.mean()), 2) if len(values) else 0
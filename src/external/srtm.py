@@ -0,0 +1,116 @@
+import math
+import os
+import re
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import numpy as np
+from logger import log
+
+# SRTM/Copernicus .hgt: ctverec 1201x1201 (3") nebo 3601x3601 (1") big-endian int16, radky od severu k jihu
+HGT_DTYPE = np.dtype(">i2")
+HGT_VOID = -32768
+HGT_NAME_PATTERN = re.compile(r"^([NS])(\d{2})([EW])(\d{3})$")
+
+
+def get_tile_name(lat: int, lng: int) -> str:
+    """Name of the tile by its south-west corner, e.g. N49E016."""
+    return f"{'N' if lat >= 0 else 'S'}{abs(lat):02d}{'E' if lng >= 0 else 'W'}{abs(lng):03d}"
+
+
+def parse_tile_name(name: str) -> Optional[Tuple[int, int]]:
+    match = HGT_NAME_PATTERN.match(name.upper())
+    if not match:
+        return None
+
+    lat_sign, lat, lng_sign, lng = match.groups()
+    return (int(lat) if lat_sign == "N" else -int(lat)), (int(lng) if lng_sign == "E" else -int(lng))
+
+
+class SRTMTiles:
+    """
+    Terrain elevation from .hgt tiles in one directory (N49E016.hgt, ...). Tiles are memory mapped, so only the pages
+    around the looked up points are read from the disk, and kept open for the lifetime of the process.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._tiles: Dict[Tuple[int, int], Optional[np.memmap]] = {}
+        self._lock = Lock()
+        self._files: Optional[Dict[Tuple[int, int], str]] = None
+
+    def _list_files(self) -> Dict[Tuple[int, int], str]:
+        files = {}
+        if not os.path.isdir(self.directory):
+            return files
+
+        for filename in os.listdir(self.directory):
+            name, extension = os.path.splitext(filename)
+            corner = parse_tile_name(name)
+            if corner is not None and extension.lower() == ".hgt":
+                files[corner] = os.path.join(self.directory, filename)
+
+        return files
+
+    def _open_tile(self, corner: Tuple[int, int]) -> Optional[np.memmap]:
+        path = self._files.get(corner)
+        if path is None:
+            log.info(f"Missing SRTM tile {get_tile_name(*corner)} in {self.directory}")
+            return None
+
+        size = math.isqrt(os.path.getsize(path) // HGT_DTYPE.itemsize)
+        return np.memmap(path, dtype=HGT_DTYPE, mode="r", shape=(size, size))
+
+    def get_tile(self, corner: Tuple[int, int]) -> Optional[np.memmap]:
+        # pouziva se z vlaken (asyncio.to_thread)
+        with self._lock:
+            if self._files is None:
+                self._files = self._list_files()
+            if corner not in self._tiles:
+                self._tiles[corner] = self._open_tile(corner)
+
+            return self._tiles[corner]
+
+    def get_elevation(self, lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+        """
+        Bilinear interpolation of the four surrounding samples, point by point in whole arrays. NaN where the tile
+        is missing or any of the samples is a void.
+        """
+        lat = np.asarray(lat, dtype="f8")
+        lng = np.asarray(lng, dtype="f8")
+        elevation = np.full(lat.shape, np.nan)
+
+        valid = np.isfinite(lat) & np.isfinite(lng)
+        south = np.floor(np.where(valid, lat, 0)).astype(int)
+        west = np.floor(np.where(valid, lng, 0)).astype(int)
+        for corner_lat, corner_lng in np.unique(np.column_stack([south[valid], west[valid]]), axis=0):
+            tile = self.get_tile((int(corner_lat), int(corner_lng)))
+            if tile is None:
+                continue
+
+            mask = valid & (south == corner_lat) & (west == corner_lng)
+            elevation[mask] = self._interpolate(tile, lat[mask] - corner_lat, lng[mask] - corner_lng)
+
+        return elevation
+
+    @staticmethod
+    def _interpolate(tile: np.ndarray, lat_offset: np.ndarray, lng_offset: np.ndarray) -> np.ndarray:
+        last = tile.shape[0] - 1
+        # prvni radek je severni okraj dlazdice
+        row = (1 - lat_offset) * last
+        col = lng_offset * last
+
+        row0 = np.clip(np.floor(row).astype(int), 0, last - 1)
+        col0 = np.clip(np.floor(col).astype(int), 0, last - 1)
+        row_weight = row - row0
+        col_weight = col - col0
+
+        samples = np.stack([
+            tile[row0, col0], tile[row0, col0 + 1], tile[row0 + 1, col0], tile[row0 + 1, col0 + 1]
+        ]).astype("f8")
+        samples[samples == HGT_VOID] = np.nan
+        top_left, top_right, bottom_left, bottom_right = samples
+
+        top = top_left * (1 - col_weight) + top_right * col_weight
+        bottom = bottom_left * (1 - col_weight) + bottom_right * col_weight
+
+        return top * (1 - row_weight) + bottom * row_weight
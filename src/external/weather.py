@@ -1,11 +1,22 @@
+import asyncio
 import datetime
 import urllib.parse
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional, Iterable
 import aiohttp
-from aiocache import cached
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert
+from config import WEATHER_CACHE_RECENT_TTL
+from database import models
+from database.transaction import get_session
+
+WeatherCacheKey = Tuple[int, int, datetime.date]
 
 
 class Weather:
+    """
+    Hourly weather from open-meteo. Downloaded days are kept in `weather_cache` per grid cell (GPS rounded
+    to `CACHE_PRECISION`) and day, concurrent requests for the same cell and day share one download.
+    """
     FORECAST_URL = "https://api.open-meteo.com/v1/forecast?"
     ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive?"
     TIMEZONE = "Europe/Prague"
@@ -13,12 +24,22 @@ class Weather:
         "pressure_msl", "temperature_2m", "dewpoint_2m", "rain", "cloudcover_low", "cloudcover", "windspeed_10m",
         "winddirection_10m"
     )
+    # setiny stupne (~1 km), modely open-meteo jemnejsi nejsou
+    CACHE_PRECISION = 100
+    ARCHIVE_AFTER_DAYS = 7
+
+    def __init__(self, recent_ttl: int):
+        self.recent_ttl = datetime.timedelta(seconds=recent_ttl)
+        self._days_in_progress: Dict[WeatherCacheKey, asyncio.Future] = {}
+
+    def is_archived(self, date: datetime.date, on_date: datetime.date) -> bool:
+        """Whether the day is already in the archive API (and so final) on `on_date`."""
+        return (on_date - date).days >= self.ARCHIVE_AFTER_DAYS
 
     def get_weather_info_url(self, start_date: datetime.date, end_date: datetime.date, gps: Tuple[float, float]) -> str:
         today = datetime.datetime.now().date()
-        date_diff = today - end_date
 
-        if date_diff.days >= 7:
+        if self.is_archived(end_date, today):
             # historical API offers data only older than 5 days
             url = self.ARCHIVE_URL
         else:
@@ -37,26 +58,113 @@ class Weather:
         query_string = urllib.parse.urlencode(params)
         return f"{url}{query_string}"
 
-    @cached(ttl=6 * 3600)
-    async def download_weather_for_day(self, date: datetime.date, gps: Tuple[float, float]):
-        url = self.get_weather_info_url(start_date=date, end_date=date, gps=gps)
+    def get_cache_key(self, date: datetime.date, gps: Tuple[float, float]) -> WeatherCacheKey:
+        return round(gps[0] * self.CACHE_PRECISION), round(gps[1] * self.CACHE_PRECISION), date
+
+    def is_cache_valid(self, cached: models.WeatherCache) -> bool:
+        # den stazeny uz z archivu se nezmeni, posledni dny z forecast API se jeste upresnuji
+        if self.is_archived(cached.date, cached.downloaded_at.date()):
+            return True
+
+        return cached.downloaded_at + self.recent_ttl > datetime.datetime.now()
+
+    async def get_cached_day(self, key: WeatherCacheKey) -> Optional[dict]:
+        async with get_session() as db:
+            cached = await db.get(models.WeatherCache, key)
+            if cached is None or not self.is_cache_valid(cached):
+                return None
+
+            return cached.hourly
+
+    async def save_cached_days(self, lat_e2: int, lng_e2: int, hourly_by_day: Dict[datetime.date, dict]):
+        downloaded_at = datetime.datetime.now()
+        query = insert(models.WeatherCache)
+
+        async with get_session() as db:
+            await db.execute(
+                query.on_duplicate_key_update(hourly=query.inserted.hourly, downloaded_at=query.inserted.downloaded_at),
+                [
+                    {"lat_e2": lat_e2, "lng_e2": lng_e2, "date": date, "hourly": hourly, "downloaded_at": downloaded_at}
+                    for date, hourly in hourly_by_day.items()
+                ]
+            )
+
+    async def download_weather(self, start_date: datetime.date, end_date: datetime.date, gps: Tuple[float, float]):
+        url = self.get_weather_info_url(start_date=start_date, end_date=end_date, gps=gps)
 
         async with aiohttp.ClientSession() as session:
             async with session.get(url) as resp:
                 resp.raise_for_status()
                 return await resp.json()
 
+    @staticmethod
+    def split_hourly_by_day(hourly: dict) -> Dict[datetime.date, dict]:
+        """Hourly values of a date range (columns aligned with `time`) as single days."""
+        days = {}
+        for idx, time in enumerate(hourly['time']):
+            day = days.setdefault(datetime.date.fromisoformat(time[:10]), {column: [] for column in hourly})
+            for column, values in hourly.items():
+                day[column].append(values[idx])
+
+        return days
+
+    async def get_cached_days(
+            self, lat_e2: int, lng_e2: int, dates: Iterable[datetime.date]) -> Dict[datetime.date, dict]:
+        async with get_session() as db:
+            cached = (await db.scalars(
+                select(models.WeatherCache)
+                .filter(models.WeatherCache.lat_e2 == lat_e2)
+                .filter(models.WeatherCache.lng_e2 == lng_e2)
+                .filter(models.WeatherCache.date.in_(list(dates)))
+            )).all()
+
+            return {day.date: day.hourly for day in cached if self.is_cache_valid(day)}
+
+    async def download_days(
+            self, lat_e2: int, lng_e2: int, start_date: datetime.date, end_date: datetime.date
+    ) -> Dict[datetime.date, dict]:
+        """Downloads the whole date range at once and stores it in the cache day by day."""
+        # stahuje se pro stred bunky, aby data v cache patrila k jejimu klici
+        gps = (lat_e2 / self.CACHE_PRECISION, lng_e2 / self.CACHE_PRECISION)
+        data = await self.download_weather(start_date, end_date, gps)
+
+        hourly_by_day = self.split_hourly_by_day(data['hourly'])
+        await self.save_cached_days(lat_e2, lng_e2, hourly_by_day)
+
+        return hourly_by_day
+
+    async def _load_day(self, key: WeatherCacheKey) -> dict:
+        hourly = await self.get_cached_day(key)
+        if hourly is not None:
+            return hourly
+
+        lat_e2, lng_e2, date = key
+        return (await self.download_days(lat_e2, lng_e2, date, date))[date]
+
+    async def get_hourly_for_day(self, date: datetime.date, gps: Tuple[float, float]) -> dict:
+        key = self.get_cache_key(date, gps)
+
+        # vzlet i pristani na stejnem letisti ve stejny den stahuji den jen jednou
+        if key not in self._days_in_progress:
+            future = asyncio.ensure_future(self._load_day(key))
+            future.add_done_callback(lambda _: self._days_in_progress.pop(key, None))
+            self._days_in_progress[key] = future
+
+        return await asyncio.shield(self._days_in_progress[key])
+
+    def get_weather_from_hourly(self, hourly: dict, idx: int) -> Dict[str, float | str]:
+        result_data = {metric: hourly[metric][idx] for metric in self.METRICS}
+        result_data['datetime'] = datetime.datetime.strptime(hourly['time'][idx], "%Y-%m-%dT%H:%M")
+
+        return result_data
+
     async def get_weather_for_hour(
             self, date_time: datetime.datetime, gps: Tuple[float, float]) -> Dict[str, float | str]:
-        data = await self.download_weather_for_day(date_time.date(), gps)
+        hourly = await self.get_hourly_for_day(date_time.date(), gps)
 
         # TODO: kontrola timezone!
         # TODO: interpolace - udelat vazenyprumer z dvou po sobe jdoucich hodin
-        idx = date_time.hour
-        result_data = {metric: data['hourly'][metric][idx] for metric in self.METRICS}
-        result_data['datetime'] = datetime.datetime.strptime(data['hourly']['time'][idx], "%Y-%m-%dT%H:%M")
-
-        return result_data
+        return self.get_weather_from_hourly(hourly, date_time.hour)
 
 
-weather_api = Weather()
+weather_api = Weather(recent_ttl=WEATHER_CACHE_RECENT_TTL)
@@ -1,7 +1,8 @@
 from collections import defaultdict
 from typing import Type, List, Optional
-from database import models, async_session
+from database import models
 from database.query_builder import QueryBuilder
+from database.transaction import get_session
 
 
 class BaseDataloader:
@@ -25,7 +26,7 @@ class BaseDataloader:
 
 class SingleModelByIdDataloader(BaseDataloader):
     async def load(self, ids: List[int]):
-        async with async_session() as session:
+        async with get_session() as session:
             query = (
                 self.query_builder.get_simple_query(extra_select=[self.relationship_column], include_deleted=True)
                 .filter(self.relationship_column.in_(set(ids)))
@@ -57,7 +58,7 @@ class MultiModelsDataloader(BaseDataloader):
         self.order_by = order_by
 
     async def load(self, ids: List[int]):
-        async with async_session() as db:
+        async with get_session() as db:
             query = (
                 self.query_builder.get_simple_query(
                     extra_select=[self.relationship_column],
@@ -1,11 +1,11 @@
 from typing import List
 from sqlalchemy import select, func
-from strawberry.dataloader import DataLoader
-from database import async_session, models
+from database import models
+from database.transaction import get_session
 
 
 async def load_flight_durations(ids: List[int]):
-    async with async_session() as db:
+    async with get_session() as db:
         flights = (await db.execute(
             select(
                 models.Flight.id,
@@ -19,6 +19,3 @@ async def load_flight_durations(ids: List[int]):
 
         items_by_id = {item.id: item.diff.seconds // 60 - item.landing_duration for item in flights}
         return [items_by_id.get(id_) for id_ in ids]
-
-
-flight_duration_dataloader = DataLoader(load_fn=load_flight_durations, cache=False)
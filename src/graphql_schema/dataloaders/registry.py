@@ -0,0 +1,77 @@
+from typing import Dict, Type, List, Callable, Awaitable
+from strawberry.dataloader import DataLoader
+from database import models
+from graphql_schema.dataloaders import single_model, multi_models
+from graphql_schema.dataloaders.flight_duration import load_flight_durations
+
+
+class DataloaderRegistry:
+    """
+    DataLoader instances for a single GraphQL request.
+
+    Loaders are created per request, so caching can stay on - every entity is fetched at most once per request
+    no matter how many fields point to it. Each loaded model is also primed into the by-ID loader of its type,
+    e.g. flights loaded for an event are not fetched again when a photo resolves its `flight`.
+    """
+
+    def __init__(self):
+        self.user = self._create(single_model.user_dataloader.load)
+        self.airport = self._create(single_model.airport_dataloader.load)
+        self.aircraft = self._create(single_model.aircraft_dataloader.load)
+        self.event = self._create(single_model.event_dataloader.load)
+        self.organization = self._create(single_model.organizations_dataloader.load)
+        self.weather_info = self._create(single_model.airport_weather_info_loader.load)
+        self.poi = self._create(single_model.poi_dataloader.load)
+        self.poi_type = self._create(single_model.poi_type_dataloader.load)
+        self.flight = self._create(single_model.flight_dataloader.load)
+        self.photo = self._create(single_model.photo_dataloader.load)
+        self.photo_adjustment = self._create(single_model.photo_adjustment_dataloader.load)
+        self.flight_track_stats = self._create(single_model.flight_track_stats_dataloader.load)
+
+        self.aircrafts_from_organization = self._create(multi_models.aircrafts_from_organization_dataloader.load)
+        self.flight_copilots = self._create(multi_models.flight_copilots_dataloader.load)
+        self.flights_by_copilot = self._create(multi_models.flights_by_copilot_dataloader.load)
+        self.public_flights_by_copilot = self._create(multi_models.public_flights_by_copilot_dataloader.load)
+        self.flights_by_aircraft = self._create(multi_models.flights_by_aircraft_dataloader.load)
+        self.flights_by_poi = self._create(multi_models.flight_by_poi_dataloader.load)
+        self.flights_by_event = self._create(multi_models.flights_by_event_dataloader.load)
+        self.public_flights_by_event = self._create(multi_models.public_flights_by_event_dataloader.load)
+        self.user_organizations = self._create(multi_models.user_organizations_dataloader.load)
+        self.users_in_organization = self._create(multi_models.users_in_organization_dataloader.load)
+        self.flight_photos = self._create(multi_models.photos_dataloader.load)
+        self.poi_photos = self._create(multi_models.poi_photos_dataloader.load)
+        self.flight_track = self._create(multi_models.flight_track_dataloader.load)
+        self.copilots_in_photo = self._create(multi_models.copilots_in_photo_dataloader.load)
+        self.photo_copilots = self._create(multi_models.photo_copilots_dataloader.load)
+        self.aircraft_photos = self._create(multi_models.photos_aircraft_dataloader.load)
+
+        self.flight_duration = DataLoader(load_fn=load_flight_durations)
+
+        # loaders keyed by primary key, these can be primed by results of any other loader
+        self._by_id: Dict[Type[models.BaseModel], DataLoader] = {
+            models.User: self.user,
+            models.Airport: self.airport,
+            models.Aircraft: self.aircraft,
+            models.Event: self.event,
+            models.Organization: self.organization,
+            models.WeatherInfo: self.weather_info,
+            models.PointOfInterest: self.poi,
+            models.PointOfInterestType: self.poi_type,
+            models.Flight: self.flight,
+            models.Photo: self.photo,
+        }
+
+    def _create(self, load_fn: Callable[[List], Awaitable[list]]) -> DataLoader:
+        async def load_and_prime(keys: List):
+            results = await load_fn(keys)
+            self.prime(results)
+            return results
+
+        return DataLoader(load_fn=load_and_prime)
+
+    def prime(self, results: list):
+        for result in results:
+            for item in (result if isinstance(result, list) else [result]):
+                loader = self._by_id.get(type(item))
+                if loader is not None:
+                    loader.prime(item.id, item)
@@ -1,12 +1,10 @@
 from typing import Optional, Type
-from strawberry.dataloader import DataLoader
 from database import models
 from graphql_schema.dataloaders.base import SingleModelByIdDataloader
 
 
 def create_dataloader(model: Type[models.BaseModel], relationship_column=None, filters: Optional[list] = None):
-    loader = SingleModelByIdDataloader(model, relationship_column, filters).load
-    return DataLoader(load_fn=loader, cache=False)
+    return SingleModelByIdDataloader(model, relationship_column, filters)
 
 
 user_dataloader = create_dataloader(models.User)
@@ -22,3 +20,6 @@ photo_adjustment_dataloader = create_dataloader(
     models.PhotoAdjustment, relationship_column=models.PhotoAdjustment.photo_id
 )
 photo_dataloader = create_dataloader(models.Photo)
+flight_track_stats_dataloader = create_dataloader(
+    models.FlightTrackStats, relationship_column=models.FlightTrackStats.flight_id
+)
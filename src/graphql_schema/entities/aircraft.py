@@ -2,7 +2,8 @@ from typing import Optional
 import strawberry
 from decorators.endpoints import authenticated_user_only, allow_public
 from decorators.error_logging import error_logging
-from .helpers.pagination import get_pagination_window, PaginationWindow
+from database import models
+from .helpers.pagination import get_pagination_window, PaginationWindow, Connection, get_connection
 from .resolvers.aircraft import AircraftMutationResolver, AircraftQueryResolver
 from graphql_schema.entities.types.mutation_input import CreateAircraftInput, EditAircraftInput
 from graphql_schema.entities.types.types import Aircraft
@@ -13,7 +14,12 @@ class AircraftQueries:
     @strawberry.field()
     @error_logging
     @authenticated_user_only()
-    async def aircrafts(root, info, limit: int, offset: int = 0) -> PaginationWindow[Aircraft]:
+    async def aircrafts(
+            root, info,
+            limit: int,
+            offset: int = 0,
+            with_total_count: bool = True,
+    ) -> PaginationWindow[Aircraft]:
         query = AircraftQueryResolver().get_query(
             info.context.user_id,
             organization_ids=info.context.organization_ids
@@ -23,7 +29,25 @@ class AircraftQueries:
             query=query,
             item_type=Aircraft,
             limit=limit,
-            offset=offset
+            offset=offset,
+            with_total_count=with_total_count,
+        )
+
+    @strawberry.field()
+    @error_logging
+    @authenticated_user_only()
+    async def aircrafts_connection(root, info, first: int, after: Optional[str] = None) -> Connection[Aircraft]:
+        query = AircraftQueryResolver().get_query(
+            info.context.user_id,
+            organization_ids=info.context.organization_ids
+        )
+
+        return await get_connection(
+            query=query,
+            item_type=Aircraft,
+            model=models.Aircraft,
+            first=first,
+            after=after,
         )
 
     @strawberry.field()
@@ -4,7 +4,9 @@ from database import models
 from decorators.endpoints import authenticated_user_only, allow_public
 from decorators.error_logging import error_logging
 from graphql_schema.entities.helpers.detail import get_detail_filters
-from graphql_schema.entities.helpers.pagination import PaginationWindow, get_pagination_window
+from graphql_schema.entities.helpers.pagination import (
+    PaginationWindow, get_pagination_window, Connection, get_connection
+)
 from graphql_schema.entities.resolvers.base import BaseMutationResolver
 from graphql_schema.entities.resolvers.event import EventQueryResolver
 from graphql_schema.entities.types.mutation_input import CreateEventInput, EditEventInput
@@ -23,6 +25,7 @@ class EventQueries:
             offset: int = 0,
             username: Optional[str] = None,
             public: Optional[bool] = False,
+            with_total_count: bool = True,
     ) -> PaginationWindow[Event]:
         query = EventQueryResolver().get_query(
             info.context.user_id,
@@ -35,7 +38,34 @@ class EventQueries:
             query=query,
             item_type=Event,
             limit=limit,
-            offset=offset
+            offset=offset,
+            with_total_count=with_total_count,
+        )
+
+    @strawberry.field()
+    @error_logging
+    @allow_public
+    async def events_connection(
+            root,
+            info,
+            first: int,
+            after: Optional[str] = None,
+            username: Optional[str] = None,
+            public: Optional[bool] = False,
+    ) -> Connection[Event]:
+        query = EventQueryResolver().get_query(
+            info.context.user_id,
+            username=username,
+            public=public
+        )
+
+        return await get_connection(
+            query=query,
+            item_type=Event,
+            model=models.Event,
+            first=first,
+            after=after,
+            sort_column=models.Event.date_from,
         )
 
     @strawberry.field()
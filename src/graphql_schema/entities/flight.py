@@ -11,7 +11,7 @@ from graphql_schema.entities.types.mutation_input import EditFlightInput, Create
 from graphql_schema.entities.types.types import Flight
 from .helpers.combobox import handle_combobox_save
 from .helpers.detail import get_detail_filters
-from .helpers.pagination import PaginationWindow, get_pagination_window
+from .helpers.pagination import PaginationWindow, get_pagination_window, Connection, get_connection
 
 
 @strawberry.type
@@ -30,6 +30,7 @@ class FlightQueries:
             copilot_id: Optional[int] = None,
             point_of_interest_id: Optional[int] = None,
             aircraft_id: Optional[int] = None,
+            with_total_count: bool = True,
     ) -> PaginationWindow[Flight]:
         query = FlightQueryResolver().get_query(
             user_id=info.context.user_id,
@@ -46,6 +47,40 @@ class FlightQueries:
             item_type=Flight,
             limit=limit,
             offset=offset,
+            with_total_count=with_total_count,
+        )
+
+    @strawberry.field()
+    @error_logging
+    @allow_public
+    async def flights_connection(
+            root, info,
+            first: int,
+            after: Optional[str] = None,
+            username: Optional[str] = None,
+            event_id: Optional[int] = None,
+            public: Optional[bool] = False,
+            copilot_id: Optional[int] = None,
+            point_of_interest_id: Optional[int] = None,
+            aircraft_id: Optional[int] = None,
+    ) -> Connection[Flight]:
+        query = FlightQueryResolver().get_query(
+            user_id=info.context.user_id,
+            username=username,
+            event_id=event_id,
+            only_public=public,
+            copilot_id=copilot_id,
+            aircraft_id=aircraft_id,
+            point_of_interest_id=point_of_interest_id
+        )
+
+        return await get_connection(
+            query=query,
+            item_type=Flight,
+            model=models.Flight,
+            first=first,
+            after=after,
+            sort_column=models.Flight.takeoff_datetime,
         )
 
     @strawberry.field()
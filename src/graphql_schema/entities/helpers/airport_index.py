@@ -0,0 +1,105 @@
+import asyncio
+import math
+import time
+from collections import defaultdict
+from typing import Optional
+import numpy as np
+from sqlalchemy import select
+from config import AIRPORT_INDEX_TTL
+from database import models
+from database.transaction import get_session
+from utils.gps import EARTH_RADIUS_M, haversine_distance
+
+# letiste dal nez takhle od zacatku/konce trasy se neuhodne
+GPX_GUESS_DISTANCE_M = 1000
+# velikost bunky mrizky ve stupnich (~11 km na sirce)
+GRID_CELL_DEG = 0.1
+
+
+class AirportIndex:
+    """
+    Airports usable for the GPX guess in memory, bucketed into a lat/lng grid, so the nearest airport is searched
+    only among the few airports from the surrounding cells. Reloaded from the DB after `ttl` seconds or `invalidate()`.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._ids = np.empty(0, dtype=np.int64)
+        self._lat = np.empty(0)
+        self._lng = np.empty(0)
+        self._cells = {}
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    @staticmethod
+    def _cell(lat: float, lng: float):
+        return math.floor(lat / GRID_CELL_DEG), math.floor(lng / GRID_CELL_DEG)
+
+    def build(self, airports):
+        ids, lat, lng = zip(*airports) if airports else ((), (), ())
+        cells = defaultdict(list)
+        for index, cell in enumerate(map(self._cell, lat, lng)):
+            cells[cell].append(index)
+
+        self._ids = np.array(ids, dtype=np.int64)
+        self._lat = np.array(lat, dtype=float)
+        self._lng = np.array(lng, dtype=float)
+        self._cells = {cell: np.array(indexes) for cell, indexes in cells.items()}
+        self._loaded_at = time.monotonic()
+
+    async def refresh(self):
+        async with self._lock:
+            # mezitim to mohl nacist jiny request
+            if self._is_fresh():
+                return
+
+            async with get_session() as db:
+                airports = (await db.execute(
+                    select(models.Airport.id, models.Airport.gps_latitude, models.Airport.gps_longitude)
+                    .filter(models.Airport.use_in_gpx_guess.is_(True))
+                    .filter(models.Airport.gps_latitude.isnot(None))
+                    .filter(models.Airport.gps_longitude.isnot(None))
+                )).all()
+
+            self.build(airports)
+
+    def find_nearest(self, lat: float, lng: float, max_distance: float = GPX_GUESS_DISTANCE_M) -> Optional[int]:
+        # kolik bunek je potreba projit, aby se pokryl `max_distance` (v delce se bunky k polum zuzuji)
+        lat_span = math.degrees(max_distance / EARTH_RADIUS_M)
+        lng_span = min(lat_span / max(math.cos(math.radians(min(abs(lat) + lat_span, 90))), 1e-6), 180)
+        min_cell, max_cell = self._cell(lat - lat_span, lng - lng_span), self._cell(lat + lat_span, lng + lng_span)
+
+        candidates = [
+            self._cells[cell]
+            for cell in (
+                (cell_lat, cell_lng)
+                for cell_lat in range(min_cell[0], max_cell[0] + 1)
+                for cell_lng in range(min_cell[1], max_cell[1] + 1)
+            )
+            if cell in self._cells
+        ]
+        if not candidates:
+            return None
+
+        candidates = np.concatenate(candidates)
+        distances = haversine_distance(lat, lng, self._lat[candidates], self._lng[candidates])
+        nearest = np.argmin(distances)
+        if distances[nearest] >= max_distance:
+            return None
+
+        return int(self._ids[candidates[nearest]])
+
+    async def get_nearest_airport_id(self, lat: float, lng: float) -> Optional[int]:
+        if not self._is_fresh():
+            await self.refresh()
+
+        return self.find_nearest(lat, lng)
+
+
+airport_index = AirportIndex(ttl=AIRPORT_INDEX_TTL)
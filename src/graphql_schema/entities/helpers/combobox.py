@@ -1,7 +1,28 @@
-from typing import Type, Optional
+from typing import Callable, List, Type, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import models
+from database.transaction import after_commit
+from graphql_schema.entities.helpers.airport_index import airport_index
+from graphql_schema.entities.helpers.name_index import find_id_by_normalized_name, name_index
 from graphql_schema.entities.types.mutation_input import ComboboxInput
+from utils.text import normalize_name
+
+
+def _is_indexed(model: Type[models.BaseModel]) -> bool:
+    return issubclass(model, models.NormalizedNameMixin)
+
+
+def _invalidate_now(model: Type[models.BaseModel], user_id: int):
+    if _is_indexed(model):
+        name_index.invalidate(model, user_id)
+    if model is models.Airport:
+        airport_index.invalidate()
+
+
+async def _invalidate(model: Type[models.BaseModel], user_id: int):
+    await after_commit(lambda: _invalidate_now(model, user_id))
 
 
 async def handle_combobox_save(
@@ -14,16 +35,89 @@ async def handle_combobox_save(
 ) -> int:
     if input.id:
         return input.id
-    else:
-        if not extra_data:
-            extra_data = {}
 
-        # TODO: vyhledat podle `name_column` existujici zaznam, pokud nebude, az pak vytvorit
+    if not extra_data:
+        extra_data = {}
+
+    if _is_indexed(model):
+        existing_id = await name_index.get_id(model, user_id, normalize_name(input.name))
+        if existing_id:
+            return existing_id
 
-        data = {name_column: input.name, **extra_data}
-        if hasattr(model, "created_by_id"):
-            data["created_by_id"] = user_id
+    data = {name_column: input.name, **extra_data}
+    if hasattr(model, "created_by_id"):
+        data["created_by_id"] = user_id
 
+    if not _is_indexed(model):
         obj = await model.create(db, data)
-        await db.flush()
+        await _invalidate(model, user_id)
         return obj.id
+
+    try:
+        async with db.begin_nested():
+            obj = await model.create(db, data)
+    except IntegrityError:
+        # stejne jmeno mezitim vytvoril jiny request (nebo tahle transakce a index ho jeste nezna)
+        existing_id = await find_id_by_normalized_name(db, model, user_id, normalize_name(input.name), lock=True)
+        if not existing_id:
+            raise
+        return existing_id
+    finally:
+        await _invalidate(model, user_id)
+
+    return obj.id
+
+
+async def handle_combobox_save_many(
+        db: AsyncSession,
+        model: Type[models.BaseModel],
+        inputs: List[Optional[ComboboxInput]],
+        user_id: int,
+        name_column: str = "name",
+        get_extra_data: Optional[Callable[[ComboboxInput], dict]] = None
+) -> List[Optional[int]]:
+    """
+    IDs for all `inputs` (None stays None), new entries are created in a single multi-row INSERT. The same new name
+    used more times creates only one record, names which already exist are resolved to existing records.
+    """
+    def get_key(name: str) -> str:
+        return normalize_name(name) if _is_indexed(model) else name
+
+    new_inputs = {}
+    for input in inputs:
+        if input and not input.id:
+            new_inputs.setdefault(get_key(input.name), input)
+
+    ids_by_key = {}
+    if _is_indexed(model):
+        for key in list(new_inputs):
+            existing_id = await name_index.get_id(model, user_id, key)
+            if existing_id:
+                ids_by_key[key] = existing_id
+                del new_inputs[key]
+
+    if new_inputs:
+        rows = []
+        for key, input in new_inputs.items():
+            data = {name_column: input.name, **(get_extra_data(input) if get_extra_data else {})}
+            if hasattr(model, "created_by_id"):
+                data["created_by_id"] = user_id
+            if _is_indexed(model):
+                # hromadny insert neprochazi ORM eventy modelu
+                data["normalized_name"] = key
+            rows.append(data)
+
+        try:
+            async with db.begin_nested():
+                new_ids = await db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+                ids_by_key.update(zip(new_inputs, new_ids.all()))
+        except IntegrityError:
+            # nektere jmeno uz existuje, po jednom to dohleda
+            for key, input in new_inputs.items():
+                ids_by_key[key] = await handle_combobox_save(
+                    db, model, input, user_id, name_column, get_extra_data(input) if get_extra_data else None
+                )
+        finally:
+            await _invalidate(model, user_id)
+
+    return [(input.id or ids_by_key[get_key(input.name)]) if input else None for input in inputs]
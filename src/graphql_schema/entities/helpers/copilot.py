@@ -0,0 +1,26 @@
+from typing import List
+from sqlalchemy import Table, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def handle_copilots_edit(
+        db: AsyncSession,
+        table: Table,
+        owner_column: str,
+        owner_id: int,
+        copilot_ids: List[int]
+):
+    """Sets copilots in a `*_has_copilot` style table, only removed and added links are written."""
+    existing = set((await db.scalars(
+        select(table.c.copilot_id).filter(table.c[owner_column] == owner_id)
+    )).all())
+    new = set(copilot_ids)
+
+    if existing - new:
+        await db.execute(
+            delete(table).filter(table.c[owner_column] == owner_id).filter(table.c.copilot_id.in_(existing - new))
+        )
+    if new - existing:
+        await db.execute(
+            insert(table), [{owner_column: owner_id, "copilot_id": copilot_id} for copilot_id in new - existing]
+        )
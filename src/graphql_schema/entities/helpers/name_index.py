@@ -0,0 +1,81 @@
+import time
+from typing import Dict, Optional, Type
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import COMBOBOX_NAME_INDEX_SIZE, COMBOBOX_NAME_INDEX_TTL
+from database import async_session, models
+from utils.lru_cache import LRUCache
+
+
+async def find_id_by_normalized_name(
+        db: AsyncSession,
+        model: Type[models.NormalizedNameMixin],
+        user_id: Optional[int],
+        normalized_name: str,
+        lock: bool = False
+) -> Optional[int]:
+    """ID of the user's record with the name, or of a shared one (without owner, e.g. imported airports)."""
+    query = (
+        select(model.id)
+        .filter(model.normalized_name == normalized_name)
+        .filter((model.created_by_id == user_id) | model.created_by_id.is_(None))
+        .filter(model.deleted.is_(False))
+        .order_by(model.created_by_id.is_(None), model.id)
+        .limit(1)
+    )
+    if lock:
+        # zamykajici cteni vidi i zaznamy, ktere commitnul soubezny request po zacatku nasi transakce
+        query = query.with_for_update(read=True)
+
+    return (await db.scalars(query)).first()
+
+
+class NameIndex:
+    """
+    Normalized names -> IDs of committed, not deleted records, per model and owner (None = shared records), so a name
+    typed in a combobox doesn't need a query. Loaded lazily, reloaded after `ttl` seconds (other processes) or
+    `invalidate()`. A miss is not authoritative, the unique constraint on the table is.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        # velikost = pocet jmen
+        self.cache = LRUCache(max_size, sizeof=lambda value: len(value[1]) + 1)
+
+    @staticmethod
+    def _key(model: Type[models.NormalizedNameMixin], owner_id: Optional[int]):
+        return model.__tablename__, owner_id
+
+    async def _get_names(self, model, owner_id: Optional[int]) -> Dict[str, int]:
+        key = self._key(model, owner_id)
+        cached = self.cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        owner_filter = model.created_by_id.is_(None) if owner_id is None else model.created_by_id == owner_id
+        # vlastni session - v indexu jsou jen commitnute zaznamy, rollback volajiciho ho nerozbije
+        async with async_session() as db:
+            rows = (await db.execute(
+                select(model.normalized_name, model.id)
+                .filter(owner_filter)
+                .filter(model.normalized_name.isnot(None))
+                .filter(model.deleted.is_(False))
+            )).all()
+
+        names = {normalized_name: id for normalized_name, id in rows}
+        self.cache.set(key, (time.monotonic(), names))
+        return names
+
+    async def get_id(self, model, user_id: Optional[int], normalized_name: str) -> Optional[int]:
+        for owner_id in (user_id, None) if user_id is not None else (None,):
+            names = await self._get_names(model, owner_id)
+            if normalized_name in names:
+                return names[normalized_name]
+
+        return None
+
+    def invalidate(self, model, user_id: Optional[int]):
+        self.cache.delete(self._key(model, user_id))
+
+
+name_index = NameIndex(ttl=COMBOBOX_NAME_INDEX_TTL, max_size=COMBOBOX_NAME_INDEX_SIZE)
@@ -0,0 +1,22 @@
+from typing import FrozenSet
+from aiocache import cached
+from sqlalchemy import select
+from config import ORGANIZATION_IDS_CACHE_TTL
+from database import async_session, models
+
+
+def _organization_ids_key(f, user_id: int) -> str:
+    return f"organization_ids:{user_id}"
+
+
+@cached(ttl=ORGANIZATION_IDS_CACHE_TTL, key_builder=_organization_ids_key)
+async def get_organization_ids(user_id: int) -> FrozenSet[int]:
+    async with async_session() as db:
+        return frozenset((await db.scalars(
+            select(models.user_is_in_organization.c.organization_id)
+            .filter(models.user_is_in_organization.c.user_id == user_id)
+        )).all())
+
+
+async def invalidate_organization_ids(user_id: int):
+    await get_organization_ids.cache.delete(_organization_ids_key(get_organization_ids, user_id))
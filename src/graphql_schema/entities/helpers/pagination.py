@@ -1,6 +1,12 @@
-from typing import TypeVar, Generic, List
+import base64
+import binascii
+import datetime
+import json
+from typing import TypeVar, Generic, List, Optional, Tuple, Any, Type
 import strawberry
-from sqlalchemy import func, Select
+from graphql import GraphQLError
+from sqlalchemy import func, Select, or_, and_
+from database import models
 from database.transaction import get_session
 
 Item = TypeVar("Item")
@@ -13,7 +19,12 @@ class PaginationWindow(Generic[Item]):
     )
 
     total_items_count: int = strawberry.field(
-        description="Total number of items in the filtered dataset."
+        description="Total number of items in the filtered dataset. "
+                    "Without `withTotalCount` it is only a lower bound (items up to the end of this window)."
+    )
+
+    has_next_page: bool = strawberry.field(
+        description="Whether there are more items after this pagination window."
     )
 
 
@@ -22,22 +33,146 @@ async def get_pagination_window(
         item_type: type,
         limit: int,
         offset: int = 0,
+        with_total_count: bool = True,
 ) -> PaginationWindow:
     if limit <= 0:
         raise Exception(f"limit ({limit}) must be > 0")
 
     async with get_session() as db:
-        cnt_query = query.with_only_columns(func.count())
-        total_items_count = (await db.scalars(cnt_query)).one()
+        if with_total_count:
+            # page and total in one statement - COUNT(*) OVER () is evaluated before LIMIT/OFFSET
+            rows = (await db.execute(
+                query.add_columns(func.count().over().label("total_items_count")).limit(limit).offset(offset)
+            )).all()
+            data = [item for item, _ in rows]
 
-    # if offset != 0 and not 0 <= offset < total_items_count:
-    #     raise Exception(f"offset ({offset}) is out of range " f"(0-{total_items_count - 1})")
+            if rows:
+                total_items_count = rows[0].total_items_count
+            elif offset:
+                # window is out of range, there is no row to read the total from
+                total_items_count = (await db.scalars(query.with_only_columns(func.count()))).one()
+            else:
+                total_items_count = 0
+
+            has_next_page = offset + len(data) < total_items_count
+        else:
+            # one extra row tells whether there is a next page
+            data = (await db.scalars(query.limit(limit + 1).offset(offset))).all()
+            has_next_page = len(data) > limit
+            data = data[:limit]
+            total_items_count = offset + len(data) + int(has_next_page)
 
-    async with get_session() as db:
-        data = (await db.scalars(query.limit(limit).offset(offset))).all()
         dataset = [item_type(**i.as_dict()) for i in data]
 
     return PaginationWindow(
         items=dataset,
-        total_items_count=total_items_count
+        total_items_count=total_items_count,
+        has_next_page=has_next_page,
+    )
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool = strawberry.field(description="Whether there are more items after `endCursor`.")
+    end_cursor: Optional[str] = strawberry.field(description="Cursor of the last edge, pass it as `after`.")
+
+
+@strawberry.type
+class Edge(Generic[Item]):
+    cursor: str
+    node: Item
+
+
+@strawberry.type
+class Connection(Generic[Item]):
+    edges: List[Edge[Item]]
+    page_info: PageInfo
+
+
+def encode_cursor(sort_value: Any, id_: int) -> str:
+    if isinstance(sort_value, (datetime.datetime, datetime.date)):
+        sort_value = sort_value.isoformat()
+
+    return base64.urlsafe_b64encode(json.dumps([sort_value, id_]).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_column) -> Tuple[Any, int]:
+    try:
+        sort_value, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort_value is not None and sort_column.type.python_type is datetime.datetime:
+            sort_value = datetime.datetime.fromisoformat(sort_value)
+        id_ = int(id_)
+    except (ValueError, TypeError, binascii.Error):
+        raise GraphQLError("Invalid cursor!")
+
+    return sort_value, id_
+
+
+def get_keyset_filter(sort_column, id_column, sort_value: Any, id_: int, descending: bool):
+    """
+    Rows following the cursor in `ORDER BY sort_column, id_column` (both in the same direction).
+    NULLs are the smallest values in MariaDB - first when ascending, last when descending.
+    """
+    nullable = sort_column.expression.nullable
+
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), id_column < id_)
+
+        conditions = [sort_column < sort_value, and_(sort_column == sort_value, id_column < id_)]
+        if nullable:
+            conditions.append(sort_column.is_(None))
+    else:
+        if sort_value is None:
+            return or_(sort_column.isnot(None), and_(sort_column.is_(None), id_column > id_))
+
+        conditions = [sort_column > sort_value, and_(sort_column == sort_value, id_column > id_)]
+
+    return or_(*conditions)
+
+
+async def get_connection(
+        query: Select,
+        item_type: type,
+        model: Type[models.BaseModel],
+        first: int,
+        after: Optional[str] = None,
+        sort_column=None,
+        descending: bool = True,
+) -> Connection:
+    """
+    Keyset (cursor) pagination - the cursor holds the sort value and ID of the last returned row, so every page
+    is a range scan over (sort_column, id) regardless of how deep it is.
+    """
+    if first <= 0:
+        raise Exception(f"first ({first}) must be > 0")
+
+    if sort_column is None:
+        sort_column = model.id
+
+    order_by = [sort_column.desc(), model.id.desc()] if descending else [sort_column.asc(), model.id.asc()]
+    query = query.order_by(None).order_by(*order_by)
+
+    if after:
+        sort_value, id_ = decode_cursor(after, sort_column)
+        query = query.filter(get_keyset_filter(sort_column, model.id, sort_value, id_, descending))
+
+    async with get_session() as db:
+        data = (await db.scalars(query.limit(first + 1))).all()
+        has_next_page = len(data) > first
+
+        edges = [
+            Edge(
+                cursor=encode_cursor(getattr(item, sort_column.key), item.id),
+                node=item_type(**item.as_dict())
+            )
+            for item in data[:first]
+        ]
+
+    return Connection(
+        edges=edges,
+        page_info=PageInfo(
+            has_next_page=has_next_page,
+            end_cursor=edges[-1].cursor if edges else None
+        )
     )
@@ -5,8 +5,9 @@ from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.exc import IntegrityError
 from database import models
 from decorators.endpoints import authenticated_user_only
-from database.transaction import get_session
+from database.transaction import after_commit, get_session
 from decorators.error_logging import error_logging
+from graphql_schema.entities.helpers.organization import invalidate_organization_ids
 from graphql_schema.entities.resolvers.base import BaseQueryResolver, BaseMutationResolver
 from graphql_schema.entities.types.mutation_input import CreateOrganizationInput, EditOrganizationInput
 from graphql_schema.entities.types.types import Organization
@@ -75,6 +76,9 @@ class OrganizationUserMutation:
             except IntegrityError:
                 pass
 
+            # az po commitu, at si jiny request nenacte stary stav
+            user_id = info.context.user_id
+            await after_commit(lambda: invalidate_organization_ids(user_id))
             return Organization(**organization.as_dict())
 
     @strawberry.mutation
@@ -93,4 +97,6 @@ class OrganizationUserMutation:
                 )
             )
 
+            user_id = info.context.user_id
+            await after_commit(lambda: invalidate_organization_ids(user_id))
             return Organization(**organization.as_dict())
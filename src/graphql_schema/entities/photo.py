@@ -3,6 +3,7 @@ import strawberry
 from database import models
 from decorators.endpoints import authenticated_user_only, allow_public
 from decorators.error_logging import error_logging
+from graphql_schema.entities.helpers.pagination import Connection, get_connection
 from graphql_schema.entities.resolvers.base import BaseQueryResolver
 from graphql_schema.entities.resolvers.photo import PhotoMutationResolver, PhotoQueryResolver
 from graphql_schema.entities.types.types import Photo
@@ -32,6 +33,38 @@ class PhotoQueries:
             order_by=[models.Photo.exposed_at]
         )
 
+    @strawberry.field()
+    @error_logging
+    @allow_public
+    async def photos_connection(
+            root, info,
+            first: int,
+            after: Optional[str] = None,
+            flight_id: Optional[int] = None,
+            copilot_id: Optional[int] = None,
+            point_of_interest_id: Optional[int] = None,
+            aircraft_id: Optional[int] = None,
+            public: Optional[bool] = False,
+    ) -> Connection[Photo]:
+        query = PhotoQueryResolver().get_query(
+            public=public,
+            flight_id=flight_id,
+            user_id=info.context.user_id,
+            copilot_id=copilot_id,
+            aircraft_id=aircraft_id,
+            point_of_interest_id=point_of_interest_id,
+        )
+
+        return await get_connection(
+            query=query,
+            item_type=Photo,
+            model=models.Photo,
+            first=first,
+            after=after,
+            sort_column=models.Photo.exposed_at,
+            descending=False,
+        )
+
     @strawberry.field()
     @error_logging
     @allow_public
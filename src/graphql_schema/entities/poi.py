@@ -8,7 +8,9 @@ from database.transaction import get_session
 from decorators.error_logging import error_logging
 from graphql_schema.entities.helpers.combobox import handle_combobox_save
 from graphql_schema.entities.helpers.detail import get_detail_filters
-from graphql_schema.entities.helpers.pagination import get_pagination_window, PaginationWindow
+from graphql_schema.entities.helpers.pagination import (
+    get_pagination_window, PaginationWindow, Connection, get_connection
+)
 from graphql_schema.entities.resolvers.base import BaseQueryResolver, BaseMutationResolver
 from graphql_schema.entities.types.types import PointOfInterest
 from graphql_schema.entities.types.mutation_input import CreatePointOfInterestInput, EditPointOfInterestInput
@@ -21,7 +23,8 @@ class PointOfInterestQueries:
     async def points_of_interest(
             root, info,
             limit: int, offset: int = 0,
-            public: bool = False
+            public: bool = False,
+            with_total_count: bool = True,
     ) -> PaginationWindow[PointOfInterest]:
         query = BaseQueryResolver(PointOfInterest, models.PointOfInterest).get_query(
             info.context.user_id, only_public=public
@@ -30,7 +33,30 @@ class PointOfInterestQueries:
             query=query,
             item_type=PointOfInterest,
             limit=limit,
-            offset=offset
+            offset=offset,
+            with_total_count=with_total_count,
+        )
+
+    @strawberry.field()
+    @error_logging
+    @allow_public
+    async def points_of_interest_connection(
+            root, info,
+            first: int,
+            after: Optional[str] = None,
+            public: bool = False,
+    ) -> Connection[PointOfInterest]:
+        query = BaseQueryResolver(PointOfInterest, models.PointOfInterest).get_query(
+            info.context.user_id, only_public=public
+        )
+        return await get_connection(
+            query=query,
+            item_type=PointOfInterest,
+            model=models.PointOfInterest,
+            first=first,
+            after=after,
+            sort_column=models.PointOfInterest.name,
+            descending=False,
         )
 
     @strawberry.field()
@@ -86,8 +112,7 @@ class PointOfInterestMutation:
                 )
 
             poi = (await db.scalars(query)).one()
-            updated_poi = await models.PointOfInterest.update(db, obj=poi, data=input_data)
-            return PointOfInterest(**updated_poi.as_dict())
+            return await BaseMutationResolver(PointOfInterest, models.PointOfInterest)._do_update(db, poi, input_data)
 
     @strawberry.mutation
     @error_logging
@@ -1,8 +1,12 @@
+from contextlib import asynccontextmanager
 from typing import Optional, Type, TypeVar, Generic, List
+from graphql import GraphQLError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import models
 from database.query_builder import QueryBuilder
-from database.transaction import get_session
+from database.transaction import after_commit, get_session
+from graphql_schema.entities.helpers.name_index import name_index
 from graphql_schema.entities.types.base import BaseGraphqlInputType
 
 GQL_TYPE = TypeVar('GQL_TYPE')
@@ -61,8 +65,30 @@ class BaseMutationResolver(BaseResolver):
         query = self.query_builder.get_simple_query(created_by_id=created_by_id).filter(self.model.id == id)
         return (await db.scalars(query)).one()
 
+    async def _invalidate_name_index(self, model: models.BaseModel):
+        if isinstance(model, models.NormalizedNameMixin):
+            created_by_id = model.created_by_id
+            await after_commit(lambda: name_index.invalidate(self.model, created_by_id))
+
+    @asynccontextmanager
+    async def _unique_name_check(self, db: AsyncSession):
+        """Turns a duplicate name (`uq_*_created_by_normalized_name`) into an error for the client."""
+        if not issubclass(self.model, models.NormalizedNameMixin):
+            yield
+            return
+
+        try:
+            async with db.begin_nested():
+                yield
+                await db.flush()
+        except IntegrityError as e:
+            raise GraphQLError("Name already exists", original_error=e)
+
     async def _do_create(self, db: AsyncSession, data: dict) -> GQL_TYPE:
-        model = await self.model.create(db, data=data)
+        async with self._unique_name_check(db):
+            model = await self.model.create(db, data=data)
+
+        await self._invalidate_name_index(model)
         return self.graphql_type(**model.as_dict())
 
     async def _do_update(self, db: AsyncSession, obj: models.BaseModel | dict | int, data: dict) -> GQL_TYPE:
@@ -74,7 +100,10 @@ class BaseMutationResolver(BaseResolver):
         else:
             update_where['id'] = obj
 
-        model = await self.model.update(db, data=data, **update_where)
+        async with self._unique_name_check(db):
+            model = await self.model.update(db, data=data, **update_where)
+
+        await self._invalidate_name_index(model)
         return self.graphql_type(**model.as_dict())
 
     async def create(self, context, data: BaseGraphqlInputType) -> GQL_TYPE:
@@ -100,5 +129,6 @@ class BaseMutationResolver(BaseResolver):
             else:
                 await db.delete(model)
 
+            await self._invalidate_name_index(model)
             return self.graphql_type(**model.as_dict())
 
@@ -1,6 +1,6 @@
 import asyncio
 from typing import List, Optional
-from sqlalchemy import delete, insert, select, func, text
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from strawberry.file_uploads import Upload
 from background_jobs.elevation import add_terrain_elevation_to_flight
@@ -8,13 +8,16 @@ from background_jobs.weather import download_weather
 from database import models
 from database.models import flight_has_copilot
 from database.transaction import get_session
-from external.gpx_parser import GPXParser
-from graphql_schema.entities.helpers.combobox import handle_combobox_save
+from external import gpx_track_cache
+from graphql_schema.entities.helpers.airport_index import airport_index
+from graphql_schema.entities.helpers.combobox import handle_combobox_save, handle_combobox_save_many
+from graphql_schema.entities.helpers.copilot import handle_copilots_edit
 from graphql_schema.entities.resolvers.base import BaseMutationResolver, BaseQueryResolver, GQL_TYPE
 from graphql_schema.entities.types.mutation_input import EditFlightInput, TrackItemInput, ComboboxInput, CreateFlightInput
 from graphql_schema.entities.types.types import Flight
 from paths import FLIGHT_GPX_TRACK_PATH
 from utils.file import delete_file
+from utils.track_stats import compute_track_stats
 from utils.upload import handle_file_upload
 
 
@@ -76,36 +79,15 @@ class FlightMutationResolver(BaseMutationResolver):
         super().__init__(Flight, models.Flight)
 
     async def get_airport_id_by_gps(self, gps_lat: float, gps_lng: float) -> Optional[int]:
-        async with get_session() as db:
-            query = select(
-                models.Airport,
-                func.coalesce((6371 * func.acos(
-                    func.cos(func.radians(gps_lat)) *
-                    func.cos(func.radians(models.Airport.gps_latitude)) *
-                    func.cos(func.radians(models.Airport.gps_longitude) - func.radians(gps_lng)) +
-                    func.sin(func.radians(gps_lat)) *
-                    func.sin(func.radians(models.Airport.gps_latitude))
-                )), 9999).label("distance")
-            ).filter(models.Airport.use_in_gpx_guess.is_(True)).order_by("distance").having(text("distance < 1")).limit(1)
-
-            data = (await db.execute(query)).one_or_none()
-
-            if data:
-                airport, distance = data
-                return airport.id
-
-            return None
+        return await airport_index.get_nearest_airport_id(gps_lat, gps_lng)
 
     async def extract_data_from_gpx(self, gpx_filename: str) -> dict:
-        data = GPXParser(f"{FLIGHT_GPX_TRACK_PATH}/{gpx_filename}")
+        track = await gpx_track_cache.load_track(gpx_filename)
 
-        times, coordinates = await asyncio.gather(
-            data.get_times(),
-            data.get_coordinates()
-        )
+        times = gpx_track_cache.get_times(track)
         takeoff_airport_id, landing_airport_id = await asyncio.gather(
-            self.get_airport_id_by_gps(coordinates[0]['lat'], coordinates[0]['lng']),
-            self.get_airport_id_by_gps(coordinates[-1]['lat'], coordinates[-1]['lng']),
+            self.get_airport_id_by_gps(float(track["lat"][0]), float(track["lng"][0])),
+            self.get_airport_id_by_gps(float(track["lat"][-1]), float(track["lng"][-1])),
         )
 
         return {
@@ -120,7 +102,7 @@ class FlightMutationResolver(BaseMutationResolver):
         user_id = context.user_id
 
         if input.gpx_track_file:
-            data['gpx_track_filename'] = await handle_upload_gpx(gpx_track=input.gpx_track_file, context=context)
+            data['gpx_track_filename'] = await handle_upload_gpx(gpx_track=input.gpx_track_file)
             data_from_gpx = await self.extract_data_from_gpx(data['gpx_track_filename'])
             data.update(data_from_gpx)
         else:
@@ -147,6 +129,8 @@ class FlightMutationResolver(BaseMutationResolver):
                 "created_by_id": context.user_id
             })
             flight = await self._do_create(db, data)
+            if data.get('gpx_track_filename'):
+                await handle_gpx_track_saved(db, context, flight.id, data['gpx_track_filename'])
 
         context.background_tasks.add_task(
             download_weather,
@@ -171,7 +155,6 @@ class FlightMutationResolver(BaseMutationResolver):
         if input.gpx_track_file is not None:
             data['gpx_track_filename'] = await handle_upload_gpx(
                 gpx_track=input.gpx_track_file,
-                context=context,
                 original_gpx_filename=flight_data['gpx_track_filename']
             )
 
@@ -215,62 +198,100 @@ class FlightMutationResolver(BaseMutationResolver):
                     user_id=context.user_id
                 )
 
+            if input.gpx_track_file is not None:
+                await handle_gpx_track_saved(db, context, flight_id, data['gpx_track_filename'])
+
             if input.track is not None:
                 await handle_track_edit(db=db, flight_id=flight_id, track=input.track, user_id=user_id)
 
             if input.copilots is not None:
-                await db.execute(delete(flight_has_copilot).filter_by(flight_id=flight_id))
-                copilots = await asyncio.gather(*[
-                    handle_combobox_save(db, models.Copilot, copilot, user_id) for copilot in input.copilots
-                ])
-
-                for copilot_id in copilots:
-                    await db.execute(insert(flight_has_copilot).values(flight_id=flight_id, copilot_id=copilot_id))
+                copilot_ids = await handle_combobox_save_many(db, models.Copilot, input.copilots, user_id)
+                await handle_copilots_edit(db, flight_has_copilot, "flight_id", flight_id, copilot_ids)
 
             return await self._do_update(db, flight_data, data)
 
 
-async def handle_upload_gpx(gpx_track: Upload, context, original_gpx_filename: Optional[str] = None):
+async def handle_upload_gpx(gpx_track: Upload, original_gpx_filename: Optional[str] = None):
     if original_gpx_filename:
         delete_file(FLIGHT_GPX_TRACK_PATH + "/" + original_gpx_filename, silent=True)
+        gpx_track_cache.delete_track_cache(original_gpx_filename)
 
     filename = await handle_file_upload(gpx_track, FLIGHT_GPX_TRACK_PATH)
-    context.background_tasks.add_task(add_terrain_elevation_to_flight, flight_id=id, gpx_filename=filename)
+    await asyncio.to_thread(gpx_track_cache.build_track_cache, filename)
 
     return filename
 
 
-async def handle_track_edit(db: AsyncSession, flight_id: int, track: List[TrackItemInput], user_id: int):
-    await db.execute(delete(models.FlightTrack).filter(models.FlightTrack.flight_id == flight_id))
+async def save_track_stats(db: AsyncSession, flight_id: int, gpx_filename: str):
+    track = await gpx_track_cache.load_track(gpx_filename)
+    if track is None:
+        return
 
-    order = 0
-    for item in track:
-        poi_id = None
-        airport_id = None
+    stats = compute_track_stats(track)
+    track_stats = (await db.scalars(
+        select(models.FlightTrackStats).filter(models.FlightTrackStats.flight_id == flight_id)
+    )).one_or_none()
 
-        if item.point_of_interest:
-            poi_id = await handle_combobox_save(
-                db, models.PointOfInterest, item.point_of_interest, user_id, extra_data={"description": ""}
-            )
+    if track_stats:
+        await models.FlightTrackStats.update(db, stats, obj=track_stats)
+    else:
+        await models.FlightTrackStats.create(db, {"flight_id": flight_id, **stats})
 
-        if item.airport:
-            airport_id = await handle_combobox_save(
-                db, models.Airport, item.airport, user_id,
-                name_column="icao_code",
-                extra_data={"name": item.airport.name}
-            )
 
-        await models.FlightTrack.create(
-            db,
-            data={
-                "flight_id": flight_id,
-                "point_of_interest_id": poi_id,
-                "airport_id": airport_id,
-                "order": order,
-                "landing_duration": item.landing_duration if airport_id else None
-            }
+async def handle_gpx_track_saved(db: AsyncSession, context, flight_id: int, gpx_filename: str):
+    # az po ulozeni letu - pri vytvareni se ID letu zna az ted
+    await save_track_stats(db, flight_id, gpx_filename)
+    context.background_tasks.add_task(add_terrain_elevation_to_flight, flight_id=flight_id, gpx_filename=gpx_filename)
+
+
+async def handle_track_edit(db: AsyncSession, flight_id: int, track: List[TrackItemInput], user_id: int):
+    poi_ids = await handle_combobox_save_many(
+        db, models.PointOfInterest, [item.point_of_interest for item in track], user_id,
+        get_extra_data=lambda input: {"description": ""}
+    )
+    airport_ids = await handle_combobox_save_many(
+        db, models.Airport, [item.airport for item in track], user_id,
+        name_column="icao_code",
+        get_extra_data=lambda input: {"name": input.name}
+    )
+
+    new_rows = [
+        {
+            "point_of_interest_id": poi_id,
+            "airport_id": airport_id,
+            "order": order,
+            "landing_duration": item.landing_duration if airport_id else None
+        }
+        for order, (item, poi_id, airport_id) in enumerate(zip(track, poi_ids, airport_ids))
+    ]
+
+    # existujici body se prepisou na miste podle poradi, zbytek se prida nebo smaze
+    existing_rows = (await db.execute(
+        select(
+            models.FlightTrack.id,
+            models.FlightTrack.point_of_interest_id,
+            models.FlightTrack.airport_id,
+            models.FlightTrack.order,
+            models.FlightTrack.landing_duration,
         )
-        order += 1
+        .filter(models.FlightTrack.flight_id == flight_id)
+        .order_by(models.FlightTrack.order, models.FlightTrack.id)
+    )).mappings().all()
+
+    changed = [
+        {"id": existing["id"], **new}
+        for existing, new in zip(existing_rows, new_rows)
+        if {key: existing[key] for key in new} != new
+    ]
+    added = [{"flight_id": flight_id, **new} for new in new_rows[len(existing_rows):]]
+    removed = [existing["id"] for existing in existing_rows[len(new_rows):]]
+
+    if changed:
+        await db.execute(update(models.FlightTrack), changed)
+    if added:
+        await db.execute(insert(models.FlightTrack), added)
+    if removed:
+        await db.execute(delete(models.FlightTrack).filter(models.FlightTrack.id.in_(removed)))
 
 
 async def handle_aircraft_save(db: AsyncSession, user_id: int, aircraft: ComboboxInput):
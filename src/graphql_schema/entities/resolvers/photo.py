@@ -1,21 +1,23 @@
+import asyncio
 import os
 import shutil
 from time import time
 from typing import Optional
 from PIL import Image
 from pydantic import BaseModel
-from sqlalchemy import delete, insert
+from sqlalchemy import delete
 from background_jobs.elevation import add_terrain_elevation_to_photo
-from background_jobs.photo import generate_thumbnail, resize_photo
+from background_jobs.photo import generate_variants, resize_photo, add_to_variants_manifest
 from database import models
 from database.transaction import get_session
 from graphql_schema.entities.helpers.combobox import handle_combobox_save
+from graphql_schema.entities.helpers.copilot import handle_copilots_edit
 from graphql_schema.entities.resolvers.base import BaseMutationResolver, BaseQueryResolver
 from graphql_schema.entities.types.mutation_input import EditPhotoInput, UploadPhotoInput, AdjustmentInput
 from graphql_schema.entities.types.types import Photo
 from paths import get_photo_basepath
 from utils.file import delete_file
-from utils.image import PhotoEditor, parse_exif_info
+from utils.image import PhotoPipeline, parse_exif_info
 from utils.upload import handle_file_upload
 
 
@@ -82,12 +84,15 @@ class PhotoMutationResolver(BaseMutationResolver):
             flight_id = photo.flight_id
             filename = photo.filename+"."+photo.filename_extension
 
-        path = get_photo_basepath(flight_id)
+            path = get_photo_basepath(flight_id)
+            original_filename = self._copy_original(path, filename)
+            await add_to_variants_manifest(db, id, {"original": original_filename})
+
         return PhotoDetailInfo(
             flight_id=flight_id,
             path=path,
             filename=filename,
-            original_filename=self._copy_original(path, filename)
+            original_filename=original_filename
         )
 
     async def upload(self, info, input: UploadPhotoInput) -> Photo:
@@ -120,7 +125,7 @@ class PhotoMutationResolver(BaseMutationResolver):
             )
 
         info.context.background_tasks.add_task(resize_photo, path=path, filename=img_name, photo_id=photo.id)
-        info.context.background_tasks.add_task(generate_thumbnail, path=path, filename=img_name)
+        info.context.background_tasks.add_task(generate_variants, path=path, filename=img_name, photo_id=photo.id)
 
         if exif_info.get("gps_latitude") and exif_info.get("gps_longitude"):
             info.context.background_tasks.add_task(add_terrain_elevation_to_photo, photo=photo)
@@ -142,9 +147,9 @@ class PhotoMutationResolver(BaseMutationResolver):
                 )
 
             if input.copilots is not None:
-                await db.execute(delete(models.copilot_has_photo).filter_by(photo_id=id))
-                for copilot in input.copilots:
-                    await db.execute(insert(models.copilot_has_photo).values(photo_id=id, copilot_id=copilot.id))
+                await handle_copilots_edit(
+                    db, models.copilot_has_photo, "photo_id", id, [copilot.id for copilot in input.copilots]
+                )
 
             return await self._do_update(db, obj=photo, data=data)
 
@@ -156,29 +161,33 @@ class PhotoMutationResolver(BaseMutationResolver):
             "counterClockwise": -90
         }
 
-        # rotate original
-        editor = PhotoEditor(photo.path, photo.original_filename)
-        editor.rotate(degrees=degrees_map[direction], crop_after_rotate=False)
-        editor.write_to_file(quality=100)
-
-        # rotate possibly adjusted image
-        editor = PhotoEditor(photo.path, photo.filename)
-        editor.rotate(degrees=degrees_map[direction], crop_after_rotate=False)
-        editor.write_to_file(quality=100)
+        # rotate original and possibly adjusted image
+        _, result = await asyncio.gather(
+            PhotoPipeline(photo.path, photo.original_filename)
+            .rotate(degrees=degrees_map[direction], crop_after_rotate=False)
+            .write_to_file(quality=100)
+            .execute(),
+            PhotoPipeline(photo.path, photo.filename)
+            .rotate(degrees=degrees_map[direction], crop_after_rotate=False)
+            .write_to_file(quality=100)
+            .execute(),
+        )
 
-        info.context.background_tasks.add_task(generate_thumbnail, path=photo.path, filename=photo.filename)
+        info.context.background_tasks.add_task(
+            generate_variants, path=photo.path, filename=photo.filename, photo_id=id
+        )
 
         async with get_session() as db:
             return await self._do_update(db, obj={"id": id}, data={
-                "width": editor.img.width,
-                "height": editor.img.height,
+                "width": result.width,
+                "height": result.height,
                 "cache_key": int(time())
             })
 
     async def adjust(self, id: int, user_id: int, adjustment: AdjustmentInput, info):
         photo = await self._get_photo_details(id, user_id)
-        editor = (
-            PhotoEditor(photo.path, photo.original_filename)
+        pipeline = (
+            PhotoPipeline(photo.path, photo.original_filename)
             .adjust(
                 brightness=adjustment.brightness,
                 contrast=adjustment.contrast,
@@ -189,14 +198,16 @@ class PhotoMutationResolver(BaseMutationResolver):
 
         if adjustment.rotate:
             rotate_angle = adjustment.rotate
-            editor.rotate(rotate_angle, adjustment.crop_after_rotate)
+            pipeline.rotate(rotate_angle, adjustment.crop_after_rotate)
 
         if adjustment.crop:
-            editor.crop(**adjustment.crop.to_dict())
+            pipeline.crop(**adjustment.crop.to_dict())
 
-        editor.write_to_file(dest_filename=photo.filename)
+        result = await pipeline.write_to_file(dest_filename=photo.filename).execute()
 
-        info.context.background_tasks.add_task(generate_thumbnail, path=photo.path, filename=photo.filename)
+        info.context.background_tasks.add_task(
+            generate_variants, path=photo.path, filename=photo.filename, photo_id=id
+        )
 
         async with (get_session() as db):
             await db.execute(delete(models.PhotoAdjustment).filter(models.PhotoAdjustment.photo_id == id))
@@ -216,8 +227,8 @@ class PhotoMutationResolver(BaseMutationResolver):
             })
 
             return await self._do_update(db, obj={"id": id}, data={
-                "width": editor.img.width,
-                "height": editor.img.height,
+                "width": result.width,
+                "height": result.height,
                 "cache_key": int(time())
             })
 
@@ -234,6 +245,7 @@ class PhotoMutationResolver(BaseMutationResolver):
             f"thumbs/{photo.filename}",
             f"thumbs/{photo.filename}.{photo.filename_extension}",
             f"thumbs/{photo.filename}.webp",
+            *[variant["filename"] for variant in (photo.variants_manifest or {}).get("variants", [])],
         ]
         for filename in files_to_delete:
             delete_file(f"{base_path}/{filename}", silent=True)
@@ -1,25 +1,13 @@
 from __future__ import annotations
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Annotated
 import strawberry
+from graphql import GraphQLError
 from database import models
-from decorators.endpoints import authenticated_user_only
-from external.gpx_parser import GPXParser
-from graphql_schema.dataloaders.flight_duration import flight_duration_dataloader
-from graphql_schema.dataloaders.multi_models import (
-    poi_photos_dataloader, flight_by_poi_dataloader, flight_copilots_dataloader, flight_track_dataloader,
-    photos_dataloader, flights_by_aircraft_dataloader, users_in_organization_dataloader,
-    aircrafts_from_organization_dataloader, user_organizations_dataloader, flights_by_event_dataloader,
-    flights_by_copilot_dataloader, public_flights_by_event_dataloader, public_flights_by_copilot_dataloader,
-    photo_copilots_dataloader, photos_aircraft_dataloader, copilots_in_photo_dataloader
-)
-from graphql_schema.dataloaders.single_model import (
-    poi_dataloader, poi_type_dataloader, event_dataloader, aircraft_dataloader, airport_dataloader,
-    airport_weather_info_loader, organizations_dataloader, flight_dataloader, photo_adjustment_dataloader,
-    photo_dataloader, user_dataloader
-)
+from external import gpx_track_cache
 from graphql_schema.sqlalchemy_to_strawberry_type import strawberry_sqlalchemy_type
-from paths import get_avatar_url, get_title_image_url, get_photo_thumbnail_url, get_photo_url, FLIGHT_GPX_TRACK_PATH
+from paths import get_avatar_url, get_title_image_url, get_photo_thumbnail_url, get_photo_url, get_photo_variants
+from utils import track_encoding
 
 
 @strawberry.type
@@ -28,18 +16,97 @@ class Point:
     lng: float
 
 
+@strawberry.type
+class PhotoVariant:
+    width: int
+    height: int
+    format: str
+    url: str
+
+
+@strawberry.type
+class PackedSeries:
+    data: str = strawberry.field(
+        description="Base64 of little-endian int32 deltas, one per point of the track. "
+                    "Value of a point is `offset + (sum of deltas up to the point) / scale`, "
+                    "delta -2147483648 marks a point without value."
+    )
+    offset: float
+    scale: float
+
+
 @strawberry.type
 class GPXTrack:
-    coordinates: List[Point]
-    speed: List[float]
-    altitude: List[float]
-    magnetic_variation: List[float]
-    terrain_elevation: List[float]
-    time: List[datetime]
-    max_speed: float
-    avg_speed: float
-    max_altitude: float
-    avg_altitude: float
+    # cely track pro statistiky, points jsou (pripadne zjednodusene) body pro vypis
+    track: strawberry.Private[gpx_track_cache.Track]
+    points: strawberry.Private[gpx_track_cache.Track]
+
+    @strawberry.field
+    def coordinates(self) -> List[Point]:
+        return [Point(**point) for point in gpx_track_cache.get_coordinates(self.points)]
+
+    @strawberry.field
+    def speed(self) -> List[float]:
+        return gpx_track_cache.get_values(self.points, "speed").tolist()
+
+    @strawberry.field
+    def altitude(self) -> List[float]:
+        return gpx_track_cache.get_values(self.points, "altitude").tolist()
+
+    @strawberry.field
+    def magnetic_variation(self) -> List[float]:
+        return gpx_track_cache.get_values(self.points, "magnetic_variation").tolist()
+
+    @strawberry.field
+    def terrain_elevation(self) -> List[float]:
+        return gpx_track_cache.get_values(self.points, "terrain_elevation").tolist()
+
+    @strawberry.field
+    def time(self) -> List[datetime]:
+        return gpx_track_cache.get_times(self.points)
+
+    def _pack(self, column: str, scale: float) -> PackedSeries:
+        data, offset = track_encoding.pack_series(self.points[column], scale)
+        return PackedSeries(data=data, offset=offset, scale=scale)
+
+    @strawberry.field(description="Coordinates in the encoded polyline format.")
+    def encoded_polyline(self, precision: int = 5) -> str:
+        if not 1 <= precision <= 7:
+            raise GraphQLError("Precision must be between 1 and 7!")
+
+        return track_encoding.encode_polyline(self.points["lat"], self.points["lng"], precision)
+
+    @strawberry.field(description="UNIX timestamps of the points.")
+    def packed_time(self) -> PackedSeries:
+        return self._pack("time", scale=1)
+
+    @strawberry.field
+    def packed_speed(self) -> PackedSeries:
+        return self._pack("speed", scale=10)
+
+    @strawberry.field
+    def packed_altitude(self) -> PackedSeries:
+        return self._pack("altitude", scale=10)
+
+    @strawberry.field
+    def packed_terrain_elevation(self) -> PackedSeries:
+        return self._pack("terrain_elevation", scale=10)
+
+    @strawberry.field
+    def max_speed(self) -> float:
+        return gpx_track_cache.get_max(self.track, "speed")
+
+    @strawberry.field
+    def avg_speed(self) -> float:
+        return gpx_track_cache.get_avg(self.track, "speed")
+
+    @strawberry.field
+    def max_altitude(self) -> float:
+        return gpx_track_cache.get_max(self.track, "altitude")
+
+    @strawberry.field
+    def avg_altitude(self) -> float:
+        return gpx_track_cache.get_avg(self.track, "altitude")
 
 
 @strawberry_sqlalchemy_type(models.Airport)
@@ -50,9 +117,11 @@ class Airport:
 @strawberry_sqlalchemy_type(models.FlightTrack)
 class FlightTrack:
     point_of_interest: Optional[PointOfInterest] = strawberry.field(
-        resolver=lambda root: poi_dataloader.load(root.point_of_interest_id)
+        resolver=lambda root, info: info.context.dataloaders.poi.load(root.point_of_interest_id)
+    )
+    airport: Optional[Airport] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.airport.load(root.airport_id)
     )
-    airport: Optional[Airport] = strawberry.field(resolver=lambda root: airport_dataloader.load(root.airport_id))
 
 
 @strawberry_sqlalchemy_type(models.PointOfInterestType)
@@ -65,119 +134,178 @@ class WeatherInfo:
     pass
 
 
+@strawberry_sqlalchemy_type(models.FlightTrackStats)
+class FlightTrackStats:
+    pass
+
+
 @strawberry_sqlalchemy_type(models.PhotoAdjustment)
 class PhotoAdjustment:
-    photo: Photo = strawberry.field(resolver=lambda root: photo_dataloader.load(root.photo_id))
+    photo: Photo = strawberry.field(resolver=lambda root, info: info.context.dataloaders.photo.load(root.photo_id))
 
 
 @strawberry_sqlalchemy_type(models.PointOfInterest)
 class PointOfInterest:
-    type: Optional[PointOfInterestType] = strawberry.field(resolver=lambda root: poi_type_dataloader.load(root.type_id))
-    photos: List[Photo] = strawberry.field(resolver=lambda root: poi_photos_dataloader.load(root.id))
-    flights: List[Flight] = strawberry.field(resolver=lambda root: flight_by_poi_dataloader.load(root.id))
-    title_photo: Optional[Photo] = strawberry.field(resolver=lambda root: photo_dataloader.load(root.title_photo_id))
+    type: Optional[PointOfInterestType] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.poi_type.load(root.type_id)
+    )
+    photos: List[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.poi_photos.load(root.id)
+    )
+    flights: List[Flight] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.flights_by_poi.load(root.id)
+    )
+    title_photo: Optional[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.photo.load(root.title_photo_id)
+    )
 
 
-@strawberry_sqlalchemy_type(models.Photo)
+@strawberry_sqlalchemy_type(models.Photo, exclude_fields=["variants_manifest"])
 class Photo:
+    variants_manifest: strawberry.Private[Optional[dict]] = None
+
+    def resolve_variants(root) -> List[PhotoVariant]:
+        return [PhotoVariant(**variant) for variant in get_photo_variants(root)]
+
+    def resolve_srcset(root, image_format: str = "webp") -> Optional[str]:
+        srcset = ", ".join(
+            f"{variant['url']} {variant['width']}w"
+            for variant in get_photo_variants(root)
+            if variant["format"] == image_format
+        )
+        return srcset or None
+
     url: str = strawberry.field(resolver=get_photo_url)
     thumbnail_url: str = strawberry.field(resolver=get_photo_thumbnail_url)
+    variants: List[PhotoVariant] = strawberry.field(
+        resolver=resolve_variants,
+        description="Resized copies of the photo, ordered by format and width."
+    )
+    srcset: Optional[str] = strawberry.field(
+        resolver=resolve_srcset,
+        description="`srcset` attribute value with all widths of the photo in `imageFormat`."
+    )
     point_of_interest: Optional[PointOfInterest] = strawberry.field(
-        resolver=lambda root: poi_dataloader.load(root.point_of_interest_id)
+        resolver=lambda root, info: info.context.dataloaders.poi.load(root.point_of_interest_id)
+    )
+    copilots: List[Copilot] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.copilots_in_photo.load(root.id)
     )
-    copilots: List[Copilot] = strawberry.field(resolver=lambda root: copilots_in_photo_dataloader.load(root.id))
-    flight: Flight = strawberry.field(resolver=lambda root: flight_dataloader.load(root.flight_id))
+    flight: Flight = strawberry.field(resolver=lambda root, info: info.context.dataloaders.flight.load(root.flight_id))
     adjustment: Optional[PhotoAdjustment] = strawberry.field(
-        resolver=lambda root: photo_adjustment_dataloader.load(root.id)
+        resolver=lambda root, info: info.context.dataloaders.photo_adjustment.load(root.id)
     )
 
 
 @strawberry_sqlalchemy_type(models.Flight)
 class Flight:
-    async def load_gpx_track(root):
+    async def load_gpx_track(
+            root,
+            tolerance: Annotated[Optional[float], strawberry.argument(
+                description="Simplify the track (Douglas-Peucker), points deviating less meters are left out."
+            )] = None,
+            max_points: Annotated[Optional[int], strawberry.argument(
+                description="Return at most this many most significant points of the track."
+            )] = None,
+    ):
         if not root.gpx_track_filename:
             return None
 
-        try:
-            gpx_parser = GPXParser(f"{FLIGHT_GPX_TRACK_PATH}/{root.gpx_track_filename}")
-        except OSError:
+        if (tolerance is not None and tolerance < 0) or (max_points is not None and max_points < 2):
+            raise GraphQLError("Tolerance must be >= 0 and maxPoints >= 2!")
+
+        track = await gpx_track_cache.load_track(root.gpx_track_filename)
+        if track is None:
             return None
 
-        return GPXTrack(
-            coordinates=[Point(**point) for point in await gpx_parser.get_coordinates()],
-            speed=await gpx_parser.get_speed(),
-            altitude=await gpx_parser.get_altitude(),
-            terrain_elevation=await gpx_parser.get_terrain_elevation(),
-            time=await gpx_parser.get_times(),
-            max_speed=await gpx_parser.get_max_speed(),
-            avg_speed=await gpx_parser.get_avg_speed(),
-            max_altitude=await gpx_parser.get_max_altitude(),
-            avg_altitude=await gpx_parser.get_avg_altitude(),
-            magnetic_variation=await gpx_parser.get_magnetic_variation(),
-        )
+        return GPXTrack(track=track, points=gpx_track_cache.simplify(track, tolerance, max_points))
 
-    @authenticated_user_only(raise_when_unauthorized=False, return_value_unauthorized=[])
-    async def load_copilots(root):
-        return await flight_copilots_dataloader.load(root.id)
+    # Both resolvers were guarded by `authenticated_user_only`, which never triggered, because they did not take
+    # `info`. Now they need it for the dataloaders, so the (public) behaviour is kept without the guard.
+    async def load_copilots(root, info):
+        return await info.context.dataloaders.flight_copilots.load(root.id)
 
-    @authenticated_user_only(raise_when_unauthorized=False, return_value_unauthorized=[])
-    async def load_event(root):
-        return await event_dataloader.load(root.event_id)
+    async def load_event(root, info):
+        return await info.context.dataloaders.event.load(root.event_id)
 
-    pilot: User = strawberry.field(resolver=lambda root: user_dataloader.load(root.created_by_id))
+    pilot: User = strawberry.field(resolver=lambda root, info: info.context.dataloaders.user.load(root.created_by_id))
     copilots: Optional[List[Copilot]] = strawberry.field(resolver=load_copilots)
     event: Optional[Event] = strawberry.field(resolver=load_event)
-    aircraft: Aircraft = strawberry.field(resolver=lambda root: aircraft_dataloader.load(root.aircraft_id))
+    aircraft: Aircraft = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.aircraft.load(root.aircraft_id)
+    )
     takeoff_airport: Optional[Airport] = strawberry.field(
-        resolver=lambda root: airport_dataloader.load(root.takeoff_airport_id)
+        resolver=lambda root, info: info.context.dataloaders.airport.load(root.takeoff_airport_id)
     )
     landing_airport: Optional[Airport] = strawberry.field(
-        resolver=lambda root: airport_dataloader.load(root.landing_airport_id)
+        resolver=lambda root, info: info.context.dataloaders.airport.load(root.landing_airport_id)
+    )
+    title_photo: Optional[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.photo.load(root.title_photo_id)
+    )
+    track: List[FlightTrack] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.flight_track.load(root.id)
     )
-    title_photo: Optional[Photo] = strawberry.field(resolver=lambda root: photo_dataloader.load(root.title_photo_id))
-    track: List[FlightTrack] = strawberry.field(resolver=lambda root: flight_track_dataloader.load(root.id))
     takeoff_weather_info: Optional[WeatherInfo] = strawberry.field(
-        resolver=lambda root: airport_weather_info_loader.load(root.takeoff_weather_info_id)
+        resolver=lambda root, info: info.context.dataloaders.weather_info.load(root.takeoff_weather_info_id)
     )
     landing_weather_info: Optional[WeatherInfo] = strawberry.field(
-        resolver=lambda root: airport_weather_info_loader.load(root.landing_weather_info_id)
+        resolver=lambda root, info: info.context.dataloaders.weather_info.load(root.landing_weather_info_id)
+    )
+    photos: List[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.flight_photos.load(root.id)
     )
-    photos: List[Photo] = strawberry.field(resolver=lambda root: photos_dataloader.load(root.id))
     gpx_track: Optional[GPXTrack] = strawberry.field(resolver=load_gpx_track)
+    track_stats: Optional[FlightTrackStats] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.flight_track_stats.load(root.id),
+        description="Statistics computed from the GPX track - distances in meters, speeds in m/s, durations in seconds."
+    )
     duration_min_calculated: int = strawberry.field(
-        resolver=lambda root: flight_duration_dataloader.load(root.id)
+        resolver=lambda root, info: info.context.dataloaders.flight_duration.load(root.id)
     )
 
 
 @strawberry_sqlalchemy_type(models.Copilot)
 class Copilot:
     async def resolve_flights(root, info):
-        dataloader = public_flights_by_copilot_dataloader
+        dataloader = info.context.dataloaders.public_flights_by_copilot
         if info.context.user_id:
-            dataloader = flights_by_copilot_dataloader
+            dataloader = info.context.dataloaders.flights_by_copilot
 
         return await dataloader.load(root.id)
 
     flights: List[Flight] = strawberry.field(resolver=resolve_flights)
-    photos: List[Photo] = strawberry.field(resolver=lambda root: photo_copilots_dataloader.load(root.id))
-    title_photo: Optional[Photo] = strawberry.field(resolver=lambda root: photo_dataloader.load(root.title_photo_id))
+    photos: List[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.photo_copilots.load(root.id)
+    )
+    title_photo: Optional[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.photo.load(root.title_photo_id)
+    )
 
 
 @strawberry_sqlalchemy_type(models.Aircraft)
 class Aircraft:
-    flights: List[Flight] = strawberry.field(resolver=lambda root: flights_by_aircraft_dataloader.load(root.id))
+    flights: List[Flight] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.flights_by_aircraft.load(root.id)
+    )
     organization: Optional[Organization] = strawberry.field(
-        resolver=lambda root: organizations_dataloader.load(root.organization_id)
+        resolver=lambda root, info: info.context.dataloaders.organization.load(root.organization_id)
+    )
+    photos: List[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.aircraft_photos.load(root.id)
+    )
+    title_photo: Optional[Photo] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.photo.load(root.title_photo_id)
     )
-    photos: List[Photo] = strawberry.field(resolver=lambda root: photos_aircraft_dataloader.load(root.id))
-    title_photo: Optional[Photo] = strawberry.field(resolver=lambda root: photo_dataloader.load(root.title_photo_id))
 
 
 @strawberry_sqlalchemy_type(models.Organization)
 class Organization:
-    users: List[User] = strawberry.field(resolver=lambda root: users_in_organization_dataloader.load(root.id))
+    users: List[User] = strawberry.field(
+        resolver=lambda root, info: info.context.dataloaders.users_in_organization.load(root.id)
+    )
     aircrafts: List[Aircraft] = strawberry.field(
-        resolver=lambda root: aircrafts_from_organization_dataloader.load(root.id)
+        resolver=lambda root, info: info.context.dataloaders.aircrafts_from_organization.load(root.id)
     )
 
 
@@ -186,7 +314,7 @@ class User:
     avatar_image_url: Optional[str] = strawberry.field(resolver=lambda root: get_avatar_url(root))
     title_image_url: str = strawberry.field(resolver=lambda root: get_title_image_url(root))
     organizations: List[Organization] = strawberry.field(
-        resolver=lambda root: user_organizations_dataloader.load(root.id)
+        resolver=lambda root, info: info.context.dataloaders.user_organizations.load(root.id)
     )
 
 
@@ -194,7 +322,8 @@ class User:
 class Event:
     async def load_flights(root, info):
         is_user_logged_in = bool(info.context.user_id)
-        dataloader = flights_by_event_dataloader if is_user_logged_in else public_flights_by_event_dataloader
+        dataloaders = info.context.dataloaders
+        dataloader = dataloaders.flights_by_event if is_user_logged_in else dataloaders.public_flights_by_event
         return await dataloader.load(root.id)
 
     flights: List[Flight] = strawberry.field(resolver=load_flights)
@@ -1,7 +1,6 @@
 from typing import Optional
 import strawberry
 from graphql import GraphQLError
-from passlib.hash import bcrypt
 from sqlalchemy import select
 from strawberry.file_uploads import Upload
 from background_jobs.photo import resize_photo
@@ -11,6 +10,7 @@ from decorators.error_logging import error_logging
 from database.transaction import get_session
 from graphql_schema.entities.types.types import User
 from utils.file import delete_file
+from utils.password import hash_password, verify_password
 from utils.upload import handle_file_upload
 
 
@@ -85,10 +85,10 @@ class EditUserMutation:
                 )
 
             if input.old_password and input.new_password:
-                if not bcrypt.verify(input.old_password, user.password_hashed):
+                if not await verify_password(input.old_password, user.password_hashed):
                     raise GraphQLError("Bad password")
 
-                data['password_hashed'] = bcrypt.hash(input.new_password)
+                data['password_hashed'] = await hash_password(input.new_password)
 
             user_model = await models.User.update(db, obj=user, data=data)
             return User(**user_model.as_dict())
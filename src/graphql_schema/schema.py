@@ -5,21 +5,54 @@ import strawberry
 from fastapi_jwt import JwtAuthorizationCredentials
 from fastapi_jwt.jwt import JwtAccessBearerCookie
 from starlette.background import BackgroundTasks
+from graphql import ExecutionResult, GraphQLError
 from strawberry.extensions import SchemaExtension
 from strawberry.fastapi import BaseContext
+from strawberry.types.graphql import OperationType
+from database import replicas
+from database.config import DB_REPLICA_STICKY_SECONDS
+from database.transaction import request_session_scope
+from logger import log
+from .dataloaders.registry import DataloaderRegistry
 from .mutation import Mutation
 from .query import Query
 
 
-# Toto se da kdyztak pouzit jako extension do Schema
-# class SQLAlchemySession(Extension):
-#     def on_request_start(self):
-#         session = async_session()
-#         print(self.execution_context.context)
-#         self.execution_context.context["db"] = session
-#
-#     async def on_request_end(self):
-#         await self.execution_context.context["db"].close()
+# po mutaci cte klient chvili z primary (zpozdeni replikace) - v cookie, dalsi request muze prijit na jiny worker
+READ_PRIMARY_COOKIE = "db_read_primary"
+
+
+class SQLAlchemySession(SchemaExtension):
+    """
+    One DB session for the whole request (see `RequestSession`) - queries read from a single snapshot (on a replica,
+    unless the client has just written something), mutations run in a single transaction on the primary, rolled back
+    when any field fails.
+    """
+
+    async def on_execute(self):
+        transactional = self.execution_context.operation_type == OperationType.MUTATION
+        context = self.execution_context.context
+        request = getattr(context, "request", None)
+        read_only = not transactional and not (request is not None and request.cookies.get(READ_PRIMARY_COOKIE))
+
+        async with request_session_scope(transactional, read_only) as request_session:
+            yield
+
+            result = self.execution_context.result
+            commit = not (result and result.errors)
+            try:
+                await request_session.finish(commit)
+                response = getattr(context, "response", None)
+                if transactional and commit and replicas.engines and response is not None:
+                    response.set_cookie(
+                        READ_PRIMARY_COOKIE, "1", max_age=DB_REPLICA_STICKY_SECONDS, httponly=True, samesite="lax"
+                    )
+            except Exception as e:
+                log.exception("Request transaction failed")
+                self.execution_context.result = ExecutionResult(
+                    data=None, errors=[GraphQLError("Transaction failed", original_error=e)]
+                )
+
 
 class LoggingExtension(SchemaExtension):
     def on_request_start(self):
@@ -36,10 +69,11 @@ class GraphQLContext(BaseContext):
     jwt_auth_credentials: JwtAuthorizationCredentials
     jwt: JwtAccessBearerCookie
     background_tasks: BackgroundTasks
+    dataloaders: DataloaderRegistry
 
 
 schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
-    extensions=[LoggingExtension]
+    extensions=[SQLAlchemySession, LoggingExtension]
 )
@@ -1,21 +1,25 @@
 import sentry_sdk
 from datetime import timedelta
 from typing import Optional
-from fastapi import FastAPI, APIRouter, Depends, Security, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Security, HTTPException, Header
 from fastapi_jwt import JwtAuthorizationCredentials, JwtAccessBearerCookie, JwtRefreshBearerCookie
 from graphql import GraphQLError
-from sqlalchemy import select
 from starlette.background import BackgroundTasks
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import RedirectResponse, Response
 from starlette.staticfiles import StaticFiles
 from strawberry.fastapi import GraphQLRouter
 from config import APP_SECRET_KEY, GRAPHIQL, APP_DEBUG, ALLOW_CORS_ORIGINS, SENTRY_DSN, REFRESH_TOKEN_VALIDITY_DAYS
-from database import models, async_session
 from endpoints.login import LoginEndpoint, LoginInput, RefreshEndpoint, LogoutEndpoint
+from endpoints.metrics import MetricsEndpoint
 from endpoints.photo_editor_preview import PhotoEditorEndpoint
 from endpoints.registration import RegistrationInput, RegistrationEndpoint
+from external.elevation import elevation_api
+from graphql_schema.dataloaders.registry import DataloaderRegistry
+from graphql_schema.entities.helpers.organization import get_organization_ids
 from graphql_schema.schema import schema, GraphQLContext
+from utils.image import image_executor
+from utils.password import password_executor
 
 
 class App:
@@ -45,6 +49,10 @@ class App:
         self.setup_static_paths(app)
         self.setup_routes(app)
 
+        app.add_event_handler("shutdown", image_executor.shutdown)
+        app.add_event_handler("shutdown", password_executor.shutdown)
+        app.add_event_handler("shutdown", elevation_api.close)
+
         return app
 
     @staticmethod
@@ -69,21 +77,15 @@ class App:
     def setup_graphql_endpoint(self, app: FastAPI):
         async def setup_graphql_context(credentials: JwtAuthorizationCredentials = Security(self.access_security)):
             user_id = credentials['id'] if credentials else None
-            organization_ids = set()
-
-            if user_id:
-                async with async_session() as db:
-                    organization_ids = set((await db.scalars(
-                        select(models.user_is_in_organization.c.organization_id)
-                        .filter(models.user_is_in_organization.c.user_id == user_id)
-                    )).all())
+            organization_ids = set(await get_organization_ids(user_id)) if user_id else set()
 
             return GraphQLContext(
                 user_id=user_id,
                 organization_ids=organization_ids,
                 jwt_auth_credentials=credentials,
                 jwt=self.access_security,
-                background_tasks=Depends(BackgroundTasks)
+                background_tasks=Depends(BackgroundTasks),
+                dataloaders=DataloaderRegistry(),
             )
 
         graphql_app = GraphQLRouter(
@@ -143,12 +145,14 @@ class App:
                 crop_top: Optional[float] = None,
                 crop_width: Optional[float] = None,
                 crop_height: Optional[float] = None,
+                if_none_match: Optional[str] = Header(None),
         ):
             return await PhotoEditorEndpoint(
                 access_token=self.access_security,
                 refresh_token=self.refresh_security
             ).show_preview(
                 photo_id=photo_id,
+                if_none_match=if_none_match,
                 logged_user_id=0,
                 saturation=saturation,
                 brightness=brightness,
@@ -161,6 +165,10 @@ class App:
                 rotate=rotate,
             )
 
+        @self.api_router.get("/metrics")
+        async def metrics(authorization: Optional[str] = Header(None)):
+            return await MetricsEndpoint().get(authorization)
+
         @self.api_router.post("/registration", status_code=201)
         async def registration(user: RegistrationInput):
             return await RegistrationEndpoint().on_post(user)
@@ -1,5 +1,4 @@
-import os
-from typing import Optional
+from typing import Optional, List
 from config import API_URL
 from logger import log
 
@@ -18,28 +17,39 @@ def get_public_url(filename: Optional[str]) -> str:
     return f"{API_URL}/uploads/{filename}" if filename else None
 
 
+def get_photo_filename(root) -> str:
+    return root.filename if not root.filename_extension else f"{root.filename}.{root.filename_extension}"
+
+
 def get_photo_url(root) -> str:
-    filename = root.filename if not root.filename_extension else f"{root.filename}.{root.filename_extension}"
-    return get_public_url(f"photos/{root.flight_id}/{filename}?cache={root.cache_key}")
+    return get_public_url(f"photos/{root.flight_id}/{get_photo_filename(root)}?cache={root.cache_key}")
 
 
 def get_photo_thumbnail_url(root) -> str:
-    filename = root.filename if not root.filename_extension else f"{root.filename}.{root.filename_extension}"
-    thumbnail_names = [
-        f"thumbs/{root.filename}.webp",
-        f"thumbs/{filename}",
-        filename,
-    ]
+    if root.variants_manifest is None:
+        # fotka jeste neprosla skriptem reconcile_photo_variants, nahled je na standardni ceste (bez kontroly disku)
+        return get_public_url(f"photos/{root.flight_id}/thumbs/{root.filename}.webp?cache={root.cache_key}")
+
+    thumbnail = root.variants_manifest.get("thumbnail") or root.variants_manifest.get("photo")
+    if not thumbnail:
+        log.warning(f"Missing thumbnail of photo ID={root.id} in flight ID={root.flight_id}")
+        return get_public_url(f"photos/missing-thumbnail.webp")
 
-    for thumbnail in thumbnail_names:
-        if os.path.isfile(f"{get_photo_basepath(root.flight_id)}/{thumbnail}"):
-            # TODO: logovani
-            return get_public_url(f"photos/{root.flight_id}/{thumbnail}?cache={root.cache_key}")
-        else:
-            log.warning(f"Missing thumbnail {thumbnail} in flight ID={root.flight_id}")
+    return get_public_url(f"photos/{root.flight_id}/{thumbnail}?cache={root.cache_key}")
 
-    # TODO: doplnit chybejici nahled, tohle by se ale nikdy nemelo stat! Vzdy musi existovat alespon originalni fotka
-    return get_public_url(f"photos/missing-thumbnail.webp")
+
+def get_photo_variants(root) -> List[dict]:
+    variants = (root.variants_manifest or {}).get("variants", [])
+
+    return [
+        {
+            "width": variant["width"],
+            "height": variant["height"],
+            "format": variant["format"],
+            "url": get_public_url(f"photos/{root.flight_id}/{variant['filename']}?cache={root.cache_key}"),
+        }
+        for variant in sorted(variants, key=lambda variant: (variant["format"], variant["width"]))
+    ]
 
 
 def get_avatar_url(user) -> str:
@@ -26,6 +26,8 @@ async def add_elevation_to_photos():
 
         points = await elevation_api.get_elevation_for_points(coordinates)
         for point in points:
+            if point['elevation'] is None:
+                continue
             photo = photos_by_corrdinates[point['lat'], point['lng']]
             await models.Photo.update(db_session=session, obj=photo, data={"terrain_elevation": point['elevation']})
         await session.flush()
@@ -50,10 +52,10 @@ async def add_elevation_to_tracks():
 
             coordinates = await gpx.get_coordinates()
             elevation = await elevation_api.get_elevation_for_points(coordinates)
-            gpx_with_elevation = gpx.add_terrain_elevation(elevation)
+            gpx.add_terrain_elevation(elevation)
 
             output_name = f"terrain_{flight.gpx_track_filename[30:]}"
-            gpx.write(gpx_with_elevation, output=f"{FLIGHT_GPX_TRACK_PATH}/{output_name}")
+            gpx.write(output=f"{FLIGHT_GPX_TRACK_PATH}/{output_name}")
             await models.Flight.update(
                 db_session=session, obj=flight, data={
                     "has_terrain_elevation": True,
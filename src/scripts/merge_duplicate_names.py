@@ -0,0 +1,80 @@
+import asyncio
+import sys
+from collections import defaultdict
+from sqlalchemy import delete, select, update
+
+sys.path.insert(0, "/app/src")
+from database import async_session, models  # noqa
+from utils.text import normalize_name  # noqa
+
+MODELS = [models.Airport, models.PointOfInterestType, models.PointOfInterest, models.Aircraft, models.Copilot]
+
+
+async def repoint_references(session, model, keep_id: int, duplicate_ids: list):
+    """Everything referencing the duplicates now references the kept record."""
+    for table in models.BaseModel.metadata.tables.values():
+        for foreign_key in table.foreign_keys:
+            if foreign_key.column is not model.__table__.c.id:
+                continue
+
+            column = foreign_key.parent
+            if not column.primary_key:
+                await session.execute(update(table).where(column.in_(duplicate_ids)).values({column.name: keep_id}))
+                continue
+
+            # M:N tabulka - vazba, kterou uz ma ponechany zaznam, by po prepsani byla dvakrat
+            other_columns = [c for c in table.primary_key.columns if c is not column]
+            linked = set((await session.execute(select(*other_columns).where(column == keep_id))).all())
+            rows = (await session.execute(select(column, *other_columns).where(column.in_(duplicate_ids)))).all()
+            for duplicate_id, *others in rows:
+                row_filter = [column == duplicate_id, *(c == value for c, value in zip(other_columns, others))]
+                if tuple(others) in linked:
+                    await session.execute(delete(table).where(*row_filter))
+                else:
+                    await session.execute(update(table).where(*row_filter).values({column.name: keep_id}))
+                    linked.add(tuple(others))
+
+
+async def merge_duplicates(model):
+    async with async_session() as session:
+        source = getattr(model, model.normalized_name_source)
+        rows = (await session.execute(
+            select(model.id, model.created_by_id, source, model.normalized_name)
+            .filter(model.deleted.is_(False))
+            .filter(model.created_by_id.isnot(None))
+            .order_by(model.id)
+        )).all()
+
+        groups = defaultdict(list)
+        for id, created_by_id, name, normalized_name in rows:
+            groups[created_by_id, normalize_name(name)].append((id, normalized_name))
+
+        for (created_by_id, normalized_name), records in groups.items():
+            (keep_id, keep_normalized_name), duplicates = records[0], records[1:]
+            duplicate_ids = [id for id, _ in duplicates]
+
+            if duplicate_ids:
+                await repoint_references(session, model, keep_id, duplicate_ids)
+                await session.execute(
+                    update(model.__table__)
+                    .where(model.id.in_(duplicate_ids))
+                    .values(deleted=True, normalized_name=None)
+                )
+                print(model.__tablename__, created_by_id, normalized_name, keep_id, "<-", duplicate_ids)
+
+            if keep_normalized_name != normalized_name:
+                await session.execute(
+                    update(model.__table__).where(model.id == keep_id).values(normalized_name=normalized_name)
+                )
+
+        await session.commit()
+
+
+async def merge_all():
+    for model in MODELS:
+        await merge_duplicates(model)
+
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(merge_all())
@@ -0,0 +1,52 @@
+import asyncio
+import os.path
+import sys
+from sqlalchemy import select
+
+sys.path.insert(0, "/app/src")
+from paths import get_photo_basepath, get_photo_filename  # noqa
+from database import async_session, models  # noqa
+
+
+def find_variants(photo: models.Photo) -> dict:
+    path = get_photo_basepath(photo.flight_id)
+    filename = get_photo_filename(photo)
+
+    candidates = {
+        "photo": [filename],
+        "thumbnail": [f"thumbs/{photo.filename}.webp", f"thumbs/{filename}"],
+        "original": [f"_original_{filename}"],
+    }
+
+    variants = {}
+    for variant, filenames in candidates.items():
+        existing = [name for name in filenames if os.path.isfile(f"{path}/{name}")]
+        if existing:
+            variants[variant] = existing[0]
+
+    return variants
+
+
+async def reconcile_photo_variants(only_missing: bool = True):
+    async with async_session() as session:
+        query = select(models.Photo)
+        if only_missing:
+            query = query.filter(models.Photo.variants_manifest.is_(None))
+
+        photos = (await session.scalars(query)).all()
+
+        for photo in photos:
+            variants = find_variants(photo)
+            if variants != photo.variants_manifest:
+                await models.Photo.update(session, {"variants_manifest": variants}, obj=photo)
+
+            print(photo.flight_id, photo.filename, variants, "OK" if variants.get("thumbnail") else "MISSING THUMBNAIL")
+
+        await session.flush()
+        await session.commit()
+
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    # --all zkontroluje i fotky, ktere uz manifest maji
+    loop.run_until_complete(reconcile_photo_variants(only_missing="--all" not in sys.argv))
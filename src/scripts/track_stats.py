@@ -0,0 +1,36 @@
+import asyncio
+import sys
+from sqlalchemy import select
+
+sys.path.insert(0, "/app/src")
+from database import async_session, models  # noqa
+from external import gpx_track_cache  # noqa
+from utils.track_stats import compute_track_stats  # noqa
+
+
+async def add_track_stats_to_flights():
+    async with async_session() as session:
+        flights = (await session.scalars(
+            select(models.Flight)
+            .outerjoin(models.FlightTrackStats, models.FlightTrackStats.flight_id == models.Flight.id)
+            .filter(models.Flight.gpx_track_filename.isnot(None))
+            .filter(models.FlightTrackStats.id.is_(None))
+        )).all()
+
+        for flight in flights:
+            track = await gpx_track_cache.load_track(flight.gpx_track_filename)
+            if track is None:
+                print(flight.id, flight.gpx_track_filename, "MISSING TRACK")
+                continue
+
+            stats = compute_track_stats(track)
+            await models.FlightTrackStats.create(session, {"flight_id": flight.id, **stats})
+            print(flight.id, flight.gpx_track_filename, stats)
+
+        await session.flush()
+        await session.commit()
+
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(add_track_stats_to_flights())
@@ -0,0 +1,126 @@
+import asyncio
+import datetime
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import insert, select, update
+
+sys.path.insert(0, "/app/src")
+from background_jobs.weather import get_weather_datetime, get_weather_info_data  # noqa
+from database import async_session, models  # noqa
+from external.weather import weather_api  # noqa
+
+TYPES = ("takeoff", "landing")
+# dny bez letu mezi dvema lety ze stejneho letiste, ktere se jeste vyplati stahnout v jednom dotazu
+MAX_GAP_DAYS = 30
+MAX_RANGE_DAYS = 366
+CONCURRENCY = 4
+
+
+def get_date_ranges(dates: Iterable[datetime.date], today: datetime.date) -> List[Tuple[datetime.date, datetime.date]]:
+    """Dates joined into ranges for one request each, a range never mixes archive and forecast days."""
+    ranges = []
+    for date in sorted(dates):
+        if ranges:
+            start, end = ranges[-1]
+            if (
+                (date - end).days <= MAX_GAP_DAYS + 1
+                and (date - start).days < MAX_RANGE_DAYS
+                and weather_api.is_archived(date, today) == weather_api.is_archived(end, today)
+            ):
+                ranges[-1] = (start, date)
+                continue
+
+        ranges.append((date, date))
+
+    return ranges
+
+
+async def get_flights_without_weather(session) -> List[tuple]:
+    flights = []
+    for type_ in TYPES:
+        date_time_column = getattr(models.Flight, f"{type_}_datetime")
+        rows = (await session.execute(
+            select(models.Flight.id, date_time_column, models.Airport.gps_latitude, models.Airport.gps_longitude)
+            .join(models.Airport, models.Airport.id == getattr(models.Flight, f"{type_}_airport_id"))
+            .filter(getattr(models.Flight, f"{type_}_weather_info_id").is_(None))
+            .filter(models.Flight.deleted.is_(False))
+            .filter(models.Airport.gps_latitude.isnot(None))
+            .filter(models.Airport.gps_longitude.isnot(None))
+        )).all()
+
+        flights += [
+            (type_, flight_id, get_weather_datetime(date_time), (lat, lng)) for flight_id, date_time, lat, lng in rows
+        ]
+
+    return flights
+
+
+async def get_hourly_for_cell(
+        lat_e2: int, lng_e2: int, dates: set, semaphore: asyncio.Semaphore) -> Dict[datetime.date, dict]:
+    hourly_by_day = await weather_api.get_cached_days(lat_e2, lng_e2, dates)
+    missing = [date for date in dates if date not in hourly_by_day]
+
+    for start_date, end_date in get_date_ranges(missing, datetime.date.today()):
+        async with semaphore:
+            try:
+                hourly_by_day.update(await weather_api.download_days(lat_e2, lng_e2, start_date, end_date))
+            except Exception as e:
+                print(lat_e2, lng_e2, start_date, end_date, "ERROR", e)
+                continue
+
+        print(lat_e2, lng_e2, start_date, end_date, "downloaded")
+
+    return hourly_by_day
+
+
+async def add_weather_to_flights():
+    async with async_session() as session:
+        flights = await get_flights_without_weather(session)
+        if not flights:
+            print("all done")
+            return
+
+        # letiste (bunky cache) -> dny, pro ktere je potreba pocasi
+        dates_by_cell = defaultdict(set)
+        for _, _, date_time, gps in flights:
+            lat_e2, lng_e2, date = weather_api.get_cache_key(date_time.date(), gps)
+            dates_by_cell[lat_e2, lng_e2].add(date)
+
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        hourly_by_cell = dict(zip(dates_by_cell, await asyncio.gather(*(
+            get_hourly_for_cell(lat_e2, lng_e2, dates, semaphore) for (lat_e2, lng_e2), dates in dates_by_cell.items()
+        ))))
+
+        for type_ in TYPES:
+            flight_ids = []
+            weather_data = []
+            for flight_type, flight_id, date_time, gps in flights:
+                lat_e2, lng_e2, date = weather_api.get_cache_key(date_time.date(), gps)
+                hourly = hourly_by_cell[lat_e2, lng_e2].get(date)
+                if flight_type != type_ or hourly is None:
+                    continue
+
+                weather = weather_api.get_weather_from_hourly(hourly, date_time.hour)
+                weather_data.append(get_weather_info_data(weather))
+                flight_ids.append(flight_id)
+
+            if not weather_data:
+                continue
+
+            weather_ids = (await session.scalars(
+                insert(models.WeatherInfo).returning(models.WeatherInfo.id, sort_by_parameter_order=True),
+                weather_data
+            )).all()
+            await session.execute(update(models.Flight), [
+                {"id": flight_id, f"{type_}_weather_info_id": weather_id}
+                for flight_id, weather_id in zip(flight_ids, weather_ids)
+            ])
+            print(type_, len(weather_ids), "flights")
+
+        await session.commit()
+
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(add_weather_to_flights())
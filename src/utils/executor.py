@@ -0,0 +1,102 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Callable, Optional, Any
+from logger import log
+
+
+def _timed_call(fn: Callable, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class BoundedExecutor:
+    """
+    Runs blocking jobs in a pool executor, so they do not block the event loop.
+
+    At most `max_workers + max_queue_size` jobs are handed over to the pool, further callers wait for a free slot
+    (back-pressure) instead of piling up in the unbounded queue of the pool.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            executor_factory: Callable[[int], Executor],
+            max_workers: int,
+            max_queue_size: int,
+    ):
+        self.name = name
+        self.executor_factory = executor_factory
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(max_workers + max_queue_size)
+
+        self.waiting = 0
+        self.submitted = 0
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.total_job_time = 0.0
+        self.max_job_time = 0.0
+        self.total_wait_time = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self.executor_factory(self.max_workers)
+
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        start = time.perf_counter()
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.submitted += 1
+        try:
+            result, job_time = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _timed_call, fn, *args
+            )
+        except Exception:
+            self.jobs_failed += 1
+            raise
+        finally:
+            self.submitted -= 1
+            self._slots.release()
+
+        self.jobs_done += 1
+        self.total_job_time += job_time
+        self.max_job_time = max(self.max_job_time, job_time)
+        self.total_wait_time += time.perf_counter() - start - job_time
+
+        log.debug(f"{self.name} job done in {job_time:.3f}s, queue depth {self.queue_depth}")
+        return result
+
+    @property
+    def queue_depth(self) -> int:
+        # jobs waiting for a slot + jobs in the pool that are not running yet
+        return self.waiting + max(self.submitted - self.max_workers, 0)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "queue_size": self.max_queue_size,
+            "queue_depth": self.queue_depth,
+            "running": min(self.submitted, self.max_workers),
+            "jobs_done": self.jobs_done,
+            "jobs_failed": self.jobs_failed,
+            "avg_job_time": round(self.total_job_time / self.jobs_done, 4) if self.jobs_done else 0,
+            "max_job_time": round(self.max_job_time, 4),
+            "avg_wait_time": round(self.total_wait_time / self.jobs_done, 4) if self.jobs_done else 0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
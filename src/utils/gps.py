@@ -1,6 +1,17 @@
 from typing import Tuple
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
 
 
 def gps_to_decimal(input: Tuple[float, float, float]) -> float:
     d, m, s = input
     return d + (m / 60.0) + (s / 3600.0)
+
+
+def haversine_distance(lat1, lng1, lat2, lng2):
+    """Great-circle distance in meters, works element-wise on NumPy arrays."""
+    lat1, lng1, lat2, lng2 = np.radians(lat1), np.radians(lng1), np.radians(lat2), np.radians(lng2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
@@ -1,13 +1,24 @@
+import dataclasses
 import io
 import math
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Any
 import exif
-from PIL import Image
+from PIL import Image, features
 from PIL.ImageEnhance import Brightness, Contrast, Color, Sharpness
+from config import IMAGE_PROCESSING_WORKERS, IMAGE_PROCESSING_QUEUE_SIZE
+from utils.executor import BoundedExecutor
 from utils.file import check_directories
 from utils.gps import gps_to_decimal
 
+image_executor = BoundedExecutor(
+    "image processing",
+    executor_factory=lambda max_workers: ProcessPoolExecutor(max_workers=max_workers),
+    max_workers=IMAGE_PROCESSING_WORKERS,
+    max_queue_size=IMAGE_PROCESSING_QUEUE_SIZE,
+)
+
 
 async def parse_exif_info(path: str, filename: str) -> dict:
     with open(f"{path}/{filename}", "rb") as f:
@@ -30,12 +41,23 @@ async def parse_exif_info(path: str, filename: str) -> dict:
         return exif_info
 
 
+@dataclasses.dataclass
+class RawImage:
+    """Decoded pixels, cheap to pass between processes and to turn back into an image (no decoding)."""
+    mode: str
+    size: Tuple[int, int]
+    data: bytes
+
+
 class PhotoEditor:
-    def __init__(self, path: str, filename: str):
+    def __init__(self, path: str, filename: str, raw: Optional[RawImage] = None):
         self.path = path
         self.filename = filename
 
-        self.img = Image.open(f"{path}/{filename}")
+        if raw:
+            self.img = Image.frombytes(raw.mode, raw.size, raw.data)
+        else:
+            self.img = Image.open(f"{path}/{filename}")
         self.img_size = self.img.size
 
     def resize(self, new_width: Optional[int] = None, new_height: Optional[int] = None):
@@ -126,6 +148,32 @@ class PhotoEditor:
 
         return img_io
 
+    def get_raw(self) -> RawImage:
+        return RawImage(mode=self.img.mode, size=self.img.size, data=self.img.tobytes())
+
+    def write_variants(
+            self, widths: List[int], formats: List[str], dest_path: str, name: str, quality: int = 80
+    ) -> List[dict]:
+        """
+        Writes the image in all widths (never upscaled) and formats supported by Pillow. Every width is resized
+        from the previous (bigger) one, the current image is left untouched.
+        """
+        check_directories(dest_path)
+        formats = [format_ for format_ in formats if features.check(format_)]
+
+        variants = []
+        img = self.img
+        for width in sorted({min(width, self.img.width) for width in widths}, reverse=True):
+            if width != img.width:
+                img = img.resize((width, round(width * img.height / img.width)), Image.BICUBIC)
+
+            for format_ in formats:
+                filename = f"{name}_{width}w.{format_}"
+                img.save(f"{dest_path}/{filename}", format_, quality=quality)
+                variants.append({"width": img.width, "height": img.height, "format": format_, "filename": filename})
+
+        return variants
+
     def write_to_file(
             self, quality: int = 90, dest_path: Optional[str] = None, dest_filename: Optional[str] = None,
             format_: Optional[str] = "JPEG"
@@ -136,3 +184,86 @@ class PhotoEditor:
         self.img.save(dest, format_, quality=quality)
 
         return dest
+
+
+@dataclasses.dataclass
+class PipelineResult:
+    width: int
+    height: int
+    outputs: List[Any]
+
+
+class PhotoPipeline:
+    """
+    Records `PhotoEditor` calls and replays them in the image processing pool, so that decoding, editing and
+    encoding of photos never runs in the event loop. Results of output calls (`write_to_file`, `get_as_stream`)
+    are returned in `PipelineResult.outputs` in the order of the calls.
+
+    With `raw` the pipeline starts from already decoded pixels instead of the file.
+    """
+
+    def __init__(self, path: str, filename: str, raw: Optional[RawImage] = None):
+        self.path = path
+        self.filename = filename
+        self.raw = raw
+        self.calls: List[Tuple[str, dict]] = []
+
+    def _add(self, method: str, **kwargs):
+        self.calls.append((method, kwargs))
+        return self
+
+    def resize(self, new_width: Optional[int] = None, new_height: Optional[int] = None):
+        return self._add("resize", new_width=new_width, new_height=new_height)
+
+    def rotate(self, degrees: float, crop_after_rotate: bool = False):
+        return self._add("rotate", degrees=degrees, crop_after_rotate=crop_after_rotate)
+
+    def crop(self, left: float, top: float, width: float, height: float):
+        return self._add("crop", left=left, top=top, width=width, height=height)
+
+    def adjust(
+            self,
+            brightness: Optional[float] = None,
+            contrast: Optional[float] = None,
+            saturation: Optional[float] = None,
+            sharpness: Optional[float] = None
+    ):
+        return self._add(
+            "adjust", brightness=brightness, contrast=contrast, saturation=saturation, sharpness=sharpness
+        )
+
+    def get_as_stream(self):
+        return self._add("get_as_stream")
+
+    def get_raw(self):
+        return self._add("get_raw")
+
+    def write_variants(
+            self, widths: List[int], formats: List[str], dest_path: str, name: str, quality: int = 80
+    ):
+        return self._add(
+            "write_variants", widths=widths, formats=formats, dest_path=dest_path, name=name, quality=quality
+        )
+
+    def write_to_file(
+            self, quality: int = 90, dest_path: Optional[str] = None, dest_filename: Optional[str] = None,
+            format_: Optional[str] = "JPEG"
+    ):
+        return self._add(
+            "write_to_file", quality=quality, dest_path=dest_path, dest_filename=dest_filename, format_=format_
+        )
+
+    def run(self) -> PipelineResult:
+        editor = PhotoEditor(self.path, self.filename, raw=self.raw)
+
+        outputs = []
+        for method, kwargs in self.calls:
+            result = getattr(editor, method)(**kwargs)
+            if result is not editor:
+                outputs.append(result)
+
+        width, height = editor.img_size
+        return PipelineResult(width=width, height=height, outputs=outputs)
+
+    async def execute(self) -> PipelineResult:
+        return await image_executor.run(self.run)
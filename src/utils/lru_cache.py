@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Any, Optional
+
+
+class LRUCache:
+    """
+    In-process cache bounded by total size of the values, least recently used values are evicted first.
+    Size of a value is computed by `sizeof` (1 per value by default, i.e. the bound is a number of values).
+    """
+
+    def __init__(self, max_size: int, sizeof: Callable[[Any], int] = lambda value: 1):
+        self.max_size = max_size
+        self.sizeof = sizeof
+
+        self._data: OrderedDict = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key not in self._data:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key: Hashable, value: Any):
+        value_size = self.sizeof(value)
+        if value_size > self.max_size:
+            # would evict everything else and still not fit
+            return
+
+        self.delete(key)
+        self._data[key] = value
+        self.size += value_size
+
+        while self.size > self.max_size:
+            _, evicted = self._data.popitem(last=False)
+            self.size -= self.sizeof(evicted)
+
+    def delete(self, key: Hashable):
+        if key in self._data:
+            self.size -= self.sizeof(self._data.pop(key))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._data),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,35 @@
+from concurrent.futures import ProcessPoolExecutor
+from passlib.hash import bcrypt
+from config import PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASHING_WORKERS, PASSWORD_HASHING_QUEUE_SIZE
+from utils.executor import BoundedExecutor
+
+# procesy - ne kazdy backend passlibu (napr. os_crypt) pri hashovani uvolni GIL
+password_executor = BoundedExecutor(
+    "password hashing",
+    executor_factory=lambda max_workers: ProcessPoolExecutor(max_workers=max_workers),
+    max_workers=PASSWORD_HASHING_WORKERS,
+    max_queue_size=PASSWORD_HASHING_QUEUE_SIZE,
+)
+
+password_hasher = bcrypt.using(rounds=PASSWORD_BCRYPT_ROUNDS)
+
+
+def _hash(password: str) -> str:
+    return password_hasher.hash(password)
+
+
+def _verify(password: str, password_hashed: str) -> bool:
+    return password_hasher.verify(password, password_hashed)
+
+
+async def hash_password(password: str) -> str:
+    return await password_executor.run(_hash, password)
+
+
+async def verify_password(password: str, password_hashed: str) -> bool:
+    return await password_executor.run(_verify, password, password_hashed)
+
+
+def needs_rehash(password_hashed: str) -> bool:
+    """True when the hash was made with other cost than `PASSWORD_BCRYPT_ROUNDS` (rehashed on the next login)."""
+    return password_hasher.needs_update(password_hashed)
@@ -0,0 +1,12 @@
+import re
+import unicodedata
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Name for duplicate detection, ignores diacritics, case and whitespace ("Letiště  Praha" -> "letiste praha")."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+
+    return _whitespace.sub(" ", name).strip().casefold()
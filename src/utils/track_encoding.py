@@ -0,0 +1,57 @@
+import base64
+from typing import Tuple
+import numpy as np
+
+# marks a point without value in packed series, the running value is not changed
+PACKED_MISSING_VALUE = np.iinfo(np.int32).min
+
+
+def _encode_polyline_values(values: np.ndarray) -> bytes:
+    # zigzag (sign to the lowest bit), then 5 bit chunks from the lowest, 0x20 = another chunk follows
+    values = ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+    shifts = np.arange(7, dtype=np.uint64) * np.uint64(5)
+    chunks = (values[:, None] >> shifts) & np.uint64(0x1f)
+
+    bit_length = np.zeros(len(values), dtype=np.int64)
+    nonzero = values > 0
+    bit_length[nonzero] = np.floor(np.log2(values[nonzero].astype(np.float64))).astype(np.int64) + 1
+    chunks_count = np.maximum(1, -(-bit_length // 5))
+
+    position = np.arange(7)
+    chunks[position[None, :] < (chunks_count[:, None] - 1)] |= np.uint64(0x20)
+    chunks += np.uint64(63)
+
+    return chunks[position[None, :] < chunks_count[:, None]].astype(np.uint8).tobytes()
+
+
+def encode_polyline(lat: np.ndarray, lng: np.ndarray, precision: int = 5) -> str:
+    """
+    Google encoded polyline algorithm format, see
+    https://developers.google.com/maps/documentation/utilities/polylinealgorithm
+    """
+    factor = 10 ** precision
+    coordinates = np.column_stack((
+        np.round(np.asarray(lat) * factor),
+        np.round(np.asarray(lng) * factor),
+    )).astype(np.int64)
+
+    deltas = np.diff(coordinates, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return _encode_polyline_values(deltas.ravel()).decode("ascii")
+
+
+def pack_series(values: np.ndarray, scale: float = 1) -> Tuple[str, float]:
+    """
+    Values as base64 of little-endian int32 deltas of `round((value - offset) * scale)`, so one point costs 4 bytes
+    before base64. Returns the data and the offset (the first present value).
+    Decoding: running sum of deltas, `value = offset + sum / scale`, PACKED_MISSING_VALUE is a point without value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    present = ~np.isnan(values)
+    offset = float(values[present][0]) if present.any() else 0.0
+
+    quantized = np.round((values[present] - offset) * scale).astype(np.int64)
+    deltas = np.full(len(values), PACKED_MISSING_VALUE, dtype=np.int64)
+    deltas[present] = np.diff(quantized, prepend=0)
+
+    return base64.b64encode(deltas.astype("<i4").tobytes()).decode("ascii"), offset
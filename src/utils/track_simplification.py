@@ -0,0 +1,85 @@
+from typing import Tuple, Optional
+import numpy as np
+from utils.gps import EARTH_RADIUS_M
+
+
+def project_to_meters(lat: np.ndarray, lng: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # equirectangular projection - for the extent of a single flight good enough to measure deviations
+    lat_rad = np.radians(lat)
+    x = np.radians(lng) * EARTH_RADIUS_M * np.cos(lat_rad.mean())
+    y = lat_rad * EARTH_RADIUS_M
+
+    return x, y
+
+
+def get_douglas_peucker_importance(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """
+    For every point the largest tolerance (in meters) at which Douglas-Peucker still keeps it, endpoints are inf.
+    `importance > tolerance` then gives the same points as running Douglas-Peucker with that tolerance, so any
+    simplification level is a single comparison instead of a new run.
+
+    All segments of one level of the recursion are processed at once.
+    """
+    count = len(lat)
+    importance = np.zeros(count)
+    if count == 0:
+        return importance
+
+    importance[[0, -1]] = np.inf
+    x, y = project_to_meters(np.asarray(lat, dtype=float), np.asarray(lng, dtype=float))
+
+    firsts = np.array([0])
+    lasts = np.array([count - 1])
+    parents = np.array([np.inf])
+
+    while True:
+        keep = lasts - firsts >= 2
+        firsts, lasts, parents = firsts[keep], lasts[keep], parents[keep]
+        if not len(firsts):
+            break
+
+        # interior points of all segments, flattened
+        lengths = lasts - firsts - 1
+        segment = np.repeat(np.arange(len(firsts)), lengths)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        points = firsts[segment] + 1 + np.arange(len(segment)) - starts[segment]
+
+        # distance of every interior point from its segment (first, last)
+        first, last = firsts[segment], lasts[segment]
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[points] - x[first], y[points] - y[first]
+        length2 = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(length2 > 0, np.clip((px * dx + py * dy) / length2, 0, 1), 0)
+        distances = np.hypot(px - t * dx, py - t * dy)
+
+        # first point with the largest distance in every segment splits it
+        max_distances = np.maximum.reduceat(distances, starts)
+        is_max = distances == max_distances[segment]
+        _, first_max = np.unique(segment[is_max], return_index=True)
+        splits = points[is_max][first_max]
+
+        # a point can't be more important than the split that made it a candidate
+        values = np.minimum(max_distances, parents)
+        importance[splits] = values
+
+        firsts, lasts, parents = (
+            np.concatenate((firsts, splits)),
+            np.concatenate((splits, lasts)),
+            np.concatenate((values, values)),
+        )
+
+    return importance
+
+
+def select_points(importance: np.ndarray, tolerance: Optional[float] = None, max_points: Optional[int] = None):
+    """Indexes of points kept for the tolerance (meters) and/or limited to the `max_points` most important ones."""
+    indexes = np.arange(len(importance))
+    if tolerance is not None:
+        indexes = indexes[importance > tolerance]
+
+    if max_points is not None and len(indexes) > max_points:
+        most_important = np.argpartition(importance[indexes], -max_points)[-max_points:]
+        indexes = np.sort(indexes[most_important])
+
+    return indexes
@@ -0,0 +1,79 @@
+from typing import Optional
+import numpy as np
+from external.gpx_track_cache import Track
+from utils.gps import haversine_distance
+
+# rychlost nad zemi (m/s), od ktere se bere, ze letadlo leti (~30 kt)
+AIRBORNE_SPEED = 15
+# rychlosti a stoupani se pocitaji pres okno bodu, aby je nezkreslil sum GPS
+RATE_WINDOW = 5
+
+
+def _round(value, digits: int = 2) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def _windowed_rates(values: np.ndarray, times: np.ndarray, window: int):
+    """Change of `values` per second over `window` points, together with the time span of every window."""
+    window = min(window, len(values) - 1)
+    duration = times[window:] - times[:-window]
+    valid = duration > 0
+
+    return (values[window:] - values[:-window])[valid] / duration[valid], duration[valid], window
+
+
+def compute_track_stats(track: Track) -> dict:
+    """
+    Statistics of the whole track (`Track` from `gpx_track_cache`). Distances are in meters, speeds
+    and climb rates in m/s, durations in seconds. Values which cannot be computed (no times, no altitude) are None.
+    """
+    lat, lng, times = track["lat"], track["lng"], track["time"]
+
+    distances = haversine_distance(lat[:-1], lng[:-1], lat[1:], lng[1:])
+    distance = float(distances.sum())
+    stats = {
+        "points_count": len(track),
+        "distance": round(distance, 1),
+        "duration": None,
+        "time_aloft": None,
+        "max_speed": None,
+        "avg_speed": None,
+        "max_altitude": None,
+        "avg_altitude": None,
+        "max_climb_rate": None,
+        "max_sink_rate": None,
+    }
+
+    has_time = ~np.isnan(times)
+    timed = times[has_time]
+    if len(timed) >= 2 and timed[-1] > timed[0]:
+        duration = timed[-1] - timed[0]
+        cumulative_distance = np.concatenate(([0], np.cumsum(distances)))[has_time]
+        speeds, spans, window = _windowed_rates(cumulative_distance, timed, RATE_WINDOW)
+
+        stats["duration"] = int(duration)
+        # kazdy usek je v `window` oknech
+        stats["time_aloft"] = int(spans[speeds >= AIRBORNE_SPEED].sum() / window)
+        stats["max_speed"] = _round(speeds.max()) if len(speeds) else None
+        stats["avg_speed"] = _round(distance / duration)
+
+    speed_tags = track["speed"][~np.isnan(track["speed"])]
+    if len(speed_tags):
+        # rychlost zaznamenana pristrojem je presnejsi nez dopocitana z pozic
+        stats["max_speed"] = _round(speed_tags.max())
+        stats["avg_speed"] = _round(speed_tags.mean())
+
+    altitude = track["altitude"]
+    has_altitude = ~np.isnan(altitude)
+    if has_altitude.any():
+        stats["max_altitude"] = _round(altitude[has_altitude].max(), 1)
+        stats["avg_altitude"] = _round(altitude[has_altitude].mean(), 1)
+
+    has_both = has_altitude & has_time
+    if has_both.sum() >= 2:
+        climb_rates, _, _ = _windowed_rates(altitude[has_both], times[has_both], RATE_WINDOW)
+        if len(climb_rates):
+            stats["max_climb_rate"] = _round(max(climb_rates.max(), 0))
+            stats["max_sink_rate"] = _round(max(-climb_rates.min(), 0))
+
+    return stats